@@ -2,6 +2,7 @@ import streamlit as st
 import os
 import re
 from openpyxl import load_workbook
+from file_io import iter_excel_rows
 import tempfile
 import zipfile
 from io import BytesIO
@@ -73,18 +74,10 @@ def process_files(data_files, match_file):
     try:
         # 加载匹配文件
         add_log("🔄 开始加载匹配文件...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(match_file.read())
-            match_file_path = tmp.name
-        
-        match_wb = load_workbook(match_file_path)
-        match_ws = match_wb.active
         match_set = set()
-        for row in match_ws.iter_rows(min_row=1, min_col=1, max_col=1, values_only=True):
+        for row in iter_excel_rows(match_file, max_col=1):
             if row[0]:
                 match_set.add(str(row[0]).lower().replace(" ", ""))
-        match_wb.close()
-        os.unlink(match_file_path)
         add_log(f"✅ 匹配文件加载完成 (共 {len(match_set)} 个 Blueland ASIN)")
         
         # 创建进度条
@@ -5,6 +5,7 @@ from io import BytesIO
 from openpyxl import Workbook
 from openpyxl.styles import PatternFill
 from openpyxl.utils.dataframe import dataframe_to_rows
+from file_io import read_excel_cached
 
 # 页面配置
 st.set_page_config(
@@ -244,11 +245,11 @@ if file1 and file2:
     
     try:
         # 读取第一个文件
-        df1 = pd.read_excel(file1, skiprows=1)
+        df1 = read_excel_cached(file1, skiprows=1)
         df1 = df1[['关键词', '搜索量排名']]
 
         # 读取第二个文件
-        df2 = pd.read_excel(file2, skiprows=1)
+        df2 = read_excel_cached(file2, skiprows=1)
         columns_to_keep = ['关键词', '翻译', '搜索量', '点击转化率', '建议竞价-推荐', '建议竞价-最高', 'ABATop3集中度-点击']
         df2 = df2[columns_to_keep]
 
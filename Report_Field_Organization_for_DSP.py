@@ -1,6 +1,11 @@
 import io
+import multiprocessing
 import os
 import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 
 import streamlit as st
@@ -28,6 +33,15 @@ DATE_NUMBER_FORMAT = "mmm dd, yyyy"
 PRIMARY_COLOR = "#00a6e4"
 WEEK_MODE_MONDAY_TO_SUNDAY = "monday_to_sunday"
 WEEK_MODE_SUNDAY_TO_SATURDAY = "sunday_to_saturday"
+BATCH_MAX_WORKERS = int(os.environ.get("DSP_BATCH_WORKERS", max(1, (os.cpu_count() or 2) - 1)))
+OUTPUT_FORMATS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+# Excel 单个工作表行数上限（含表头）
+EXCEL_MAX_ROWS = 1048576
+DATE_FORMATS = ("%b %d, %Y", "%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y", "%Y.%m.%d")
 
 
 def normalize_header(value):
@@ -88,16 +102,20 @@ def parse_date_value(value):
     if isinstance(value, date):
         return value
 
-    text = str(value).strip()
+    parsed_date, _ = parse_date_text(str(value).strip(), DATE_FORMATS)
+    return parsed_date
+
+
+def parse_date_text(text, formats):
     if not text:
-        return None
+        return None, None
 
-    for fmt in ("%b %d, %Y", "%Y/%m/%d", "%Y-%m-%d", "%m/%d/%Y", "%Y.%m.%d"):
+    for fmt in formats:
         try:
-            return datetime.strptime(text, fmt).date()
+            return datetime.strptime(text, fmt).date(), fmt
         except ValueError:
             continue
-    return None
+    return None, None
 
 
 def build_order_headers(total_columns):
@@ -214,6 +232,62 @@ def derive_date_fields(value, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
     )
 
 
+class DateFieldCache:
+    # 单次处理内的日期缓存：不同 Date 值 → (Year, Day, Week, Month)，上次命中的格式优先尝试
+    def __init__(self, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
+        self.week_mode = week_mode
+        self.detected_format = None
+        self.hits = 0
+        self.misses = 0
+        self._fields = {}
+
+    def parse(self, value):
+        if value is None or value == "":
+            return None
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+
+        formats = DATE_FORMATS
+        if self.detected_format is not None:
+            formats = (self.detected_format,) + tuple(fmt for fmt in DATE_FORMATS if fmt != self.detected_format)
+        parsed_date, fmt = parse_date_text(str(value).strip(), formats)
+        if fmt is not None:
+            self.detected_format = fmt
+        return parsed_date
+
+    def derive(self, value):
+        try:
+            fields = self._fields[value]
+        except KeyError:
+            pass
+        except TypeError:
+            return derive_date_fields(value, self.week_mode)
+        else:
+            self.hits += 1
+            return fields
+
+        self.misses += 1
+        parsed_date = self.parse(value)
+        if parsed_date is None:
+            fields = ("", value if value is not None else "", "", "")
+        else:
+            fields = (parsed_date.year, parsed_date, week_code(parsed_date, self.week_mode), parsed_date.month)
+        self._fields[value] = fields
+        return fields
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self):
+        return (
+            f"日期缓存：{len(self._fields)} 个不同日期，命中率 {self.hit_rate():.1%}"
+            f"（{self.hits}/{self.hits + self.misses}），格式 {self.detected_format or '-'}"
+        )
+
+
 def count_delimiter(value, delimiter):
     return string_value(value).count(delimiter)
 
@@ -227,15 +301,16 @@ def load_openpyxl():
     return Workbook, load_workbook
 
 
-def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
-    Workbook, _ = load_openpyxl()
-    worksheet = workbook.active
+def load_pandas():
+    try:
+        import pandas as pd
+    except ImportError as exc:
+        raise ImportError("缺少 pandas，请先运行：pip3 install pandas") from exc
 
-    if worksheet.max_row < 1 or worksheet.max_column < 1:
-        raise ValueError("当前工作表为空，无法处理。")
+    return pd
 
-    original_headers = [rename_header(cell.value) for cell in worksheet[1]]
 
+def locate_key_columns(original_headers):
     date_header, date_index = find_header(original_headers, ["Date"])
     order_header, order_index = find_header(original_headers, ["Order", "Campaign name"])
     line_header, line_index = find_header(original_headers, ["Line item", "Ad group name"])
@@ -254,6 +329,47 @@ def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
     if missing_headers:
         raise ValueError("缺少必要列：" + "、".join(missing_headers))
 
+    return date_index, order_index, line_index, creative_index
+
+
+def field_totals(order_max, line_max, creative_max):
+    return (
+        max(order_max + 1, len(ORDER_FIXED_HEADERS)),
+        max(line_max + 2, len(LINE_FIXED_HEADERS)),
+        max(creative_max + 2, len(CREATIVE_FIXED_HEADERS)),
+    )
+
+
+def build_prefix_headers(order_total_columns, line_total_columns, creative_total_columns):
+    return (
+        DATE_HEADERS
+        + build_order_headers(order_total_columns)
+        + build_line_headers(line_total_columns)
+        + build_creative_headers(creative_total_columns)
+    )
+
+
+def derive_row_values(date_value, order_value, line_value, creative_value, totals, date_cache):
+    order_total_columns, line_total_columns, creative_total_columns = totals
+    derived_values = []
+    derived_values.extend(date_cache.derive(date_value))
+    derived_values.extend(parse_order_fields(order_value, order_total_columns))
+    derived_values.extend(parse_line_fields(line_value, line_total_columns))
+    derived_values.extend(parse_creative_fields(creative_value, creative_total_columns))
+    return derived_values
+
+
+def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, date_cache=None):
+    Workbook, _ = load_openpyxl()
+    date_cache = date_cache or DateFieldCache(week_mode)
+    worksheet = workbook.active
+
+    if worksheet.max_row < 1 or worksheet.max_column < 1:
+        raise ValueError("当前工作表为空，无法处理。")
+
+    original_headers = [rename_header(cell.value) for cell in worksheet[1]]
+    date_index, order_index, line_index, creative_index = locate_key_columns(original_headers)
+
     order_max = 0
     line_max = 0
     creative_max = 0
@@ -262,19 +378,13 @@ def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
         line_max = max(line_max, count_delimiter(row[line_index].value, "|"))
         creative_max = max(creative_max, count_delimiter(row[creative_index].value, "|"))
 
-    order_total_columns = max(order_max + 1, len(ORDER_FIXED_HEADERS))
-    line_total_columns = max(line_max + 2, len(LINE_FIXED_HEADERS))
-    creative_total_columns = max(creative_max + 2, len(CREATIVE_FIXED_HEADERS))
+    totals = field_totals(order_max, line_max, creative_max)
 
     new_workbook = Workbook()
     new_worksheet = new_workbook.active
     new_worksheet.title = f"{worksheet.title}_processed"
 
-    order_headers = build_order_headers(order_total_columns)
-    line_headers = build_line_headers(line_total_columns)
-    creative_headers = build_creative_headers(creative_total_columns)
-
-    prefix_headers = DATE_HEADERS + order_headers + line_headers + creative_headers
+    prefix_headers = build_prefix_headers(*totals)
     all_headers = prefix_headers + original_headers
 
     for column_index, header in enumerate(all_headers, start=1):
@@ -283,16 +393,14 @@ def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
     original_start_column = len(prefix_headers) + 1
 
     for new_row_index, row in enumerate(worksheet.iter_rows(min_row=2), start=2):
-        date_value = row[date_index].value
-        order_value = row[order_index].value
-        line_value = row[line_index].value
-        creative_value = row[creative_index].value
-
-        derived_values = []
-        derived_values.extend(derive_date_fields(date_value, week_mode))
-        derived_values.extend(parse_order_fields(order_value, order_total_columns))
-        derived_values.extend(parse_line_fields(line_value, line_total_columns))
-        derived_values.extend(parse_creative_fields(creative_value, creative_total_columns))
+        derived_values = derive_row_values(
+            row[date_index].value,
+            row[order_index].value,
+            row[line_index].value,
+            row[creative_index].value,
+            totals,
+            date_cache,
+        )
 
         for column_index, value in enumerate(derived_values, start=1):
             cell = new_worksheet.cell(row=new_row_index, column=column_index, value=value)
@@ -309,23 +417,404 @@ def build_processed_workbook(workbook, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
     return new_workbook, max(worksheet.max_row - 1, 0)
 
 
-def process_workbook(input_path, output_path, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
-    _, load_workbook = load_openpyxl()
-    workbook = load_workbook(input_path)
-    new_workbook, _ = build_processed_workbook(workbook, week_mode)
+# read_only 读取 + write_only 逐行写出，内存占用与行数无关；输出内容与 build_processed_workbook 相同
+def build_processed_workbook_streaming(input_file, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, date_cache=None):
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+
+    Workbook, load_workbook = load_openpyxl()
+    date_cache = date_cache or DateFieldCache(week_mode)
+    workbook = load_workbook(input_file, read_only=True)
+    try:
+        worksheet = workbook.active
+        header_row = next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+        if not header_row:
+            raise ValueError("当前工作表为空，无法处理。")
+
+        original_headers = [rename_header(value) for value in header_row]
+        key_indexes = locate_key_columns(original_headers)
+        date_index, order_index, line_index, creative_index = key_indexes
+        width = len(original_headers)
+
+        # 第一遍只读取 Order / Line item / Creative 三列，统计拆分后的列数
+        min_col = min(key_indexes) + 1
+        max_col = max(key_indexes) + 1
+        order_max = 0
+        line_max = 0
+        creative_max = 0
+        for values in worksheet.iter_rows(min_row=2, min_col=min_col, max_col=max_col, values_only=True):
+            order_max = max(order_max, count_delimiter(values[order_index - min_col + 1], "_"))
+            line_max = max(line_max, count_delimiter(values[line_index - min_col + 1], "|"))
+            creative_max = max(creative_max, count_delimiter(values[creative_index - min_col + 1], "|"))
+
+        totals = field_totals(order_max, line_max, creative_max)
+        prefix_headers = build_prefix_headers(*totals)
+
+        new_workbook = Workbook(write_only=True)
+        new_worksheet = new_workbook.create_sheet(f"{worksheet.title}_processed")
+        new_worksheet.freeze_panes = "A2"
+        new_worksheet.append(prefix_headers + original_headers)
+
+        processed_rows = 0
+        for row in worksheet.iter_rows(min_row=2, max_col=width):
+            derived_values = derive_row_values(
+                row[date_index].value,
+                row[order_index].value,
+                row[line_index].value,
+                row[creative_index].value,
+                totals,
+                date_cache,
+            )
+            if derived_values[1] not in ("", None):
+                date_cell = WriteOnlyCell(new_worksheet, value=derived_values[1])
+                date_cell.number_format = DATE_NUMBER_FORMAT
+                derived_values[1] = date_cell
+
+            source_values = []
+            for source_cell in row:
+                number_format = getattr(source_cell, "number_format", None)
+                if number_format and number_format != "General":
+                    target_cell = WriteOnlyCell(new_worksheet, value=source_cell.value)
+                    target_cell.number_format = number_format
+                    source_values.append(target_cell)
+                else:
+                    source_values.append(source_cell.value)
+
+            new_worksheet.append(derived_values + source_values)
+            processed_rows += 1
+
+        last_column = get_column_letter(len(prefix_headers) + width)
+        new_worksheet.auto_filter.ref = f"A1:{last_column}{processed_rows + 1}"
+        return new_workbook, processed_rows
+    finally:
+        workbook.close()
+
+
+def text_column(series):
+    return series.where(series.notna(), "").astype(str)
+
+
+def split_column(series, delimiter, total_parts):
+    pd = load_pandas()
+    parts = text_column(series).str.split(delimiter, expand=True)
+    # 补齐的列全为缺失值（非字符串），先填充再 strip
+    parts = parts.reindex(columns=range(max(total_parts, parts.shape[1]))).fillna("")
+    parts = parts.apply(lambda column: column.str.strip())
+    return parts.iloc[:, :total_parts] if total_parts else pd.DataFrame(index=series.index)
+
+
+def max_delimiter_count(series, delimiter):
+    if series.empty:
+        return 0
+    return int(text_column(series).str.count(re.escape(delimiter)).max())
+
+
+def order_fields_frame(series, total_columns):
+    parts = split_column(series, "_", total_columns)
+    return parts.set_axis(build_order_headers(total_columns), axis=1)
+
+
+def line_fields_frame(series, total_columns):
+    pd = load_pandas()
+    custom_count = total_columns - len(LINE_FIXED_HEADERS)
+    parts = split_column(series, "|", 3 + custom_count)
+    audience_details = parts[2]
+    audience = audience_details.str.split("-", n=1).str[0].str.rstrip()
+    frame = pd.concat([parts[0], parts[1], audience, audience_details, parts.iloc[:, 3:]], axis=1)
+    return frame.set_axis(build_line_headers(total_columns), axis=1)
+
+
+def creative_type_frame(series):
+    pd = load_pandas()
+    pieces = series.str.split(" ", n=1, expand=True).reindex(columns=[0, 1])
+    keep_whole = series.str.fullmatch(r"[A-Za-z ]+") | pieces[1].isna()
+    creative_type = series.where(keep_whole, pieces[0].str.strip())
+    resolution = pieces[1].fillna("").str.strip().where(~keep_whole, "")
+    return pd.concat([creative_type, resolution], axis=1)
+
+
+def creative_fields_frame(series, total_columns):
+    pd = load_pandas()
+    custom_count = total_columns - len(CREATIVE_FIXED_HEADERS)
+    parts = split_column(series, "|", 6 + custom_count)
+    frame = pd.concat(
+        [parts[0], parts[1], parts[2], creative_type_frame(parts[3]), parts[4], parts[5], parts.iloc[:, 6:]],
+        axis=1,
+    )
+    return frame.set_axis(build_creative_headers(total_columns), axis=1)
+
+
+def date_fields_frame(series, date_cache):
+    # 日期列通常只有几百个不同值：每个不同值解析一次，再按编码整体取回
+    pd = load_pandas()
+    values = series.astype(object).where(series.notna(), None)
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    table = pd.DataFrame(
+        [date_cache.derive(value) for value in uniques],
+        columns=DATE_HEADERS,
+        dtype=object,
+    )
+    # 重复出现的日期按行计入命中，命中率与逐行处理的 openpyxl 引擎口径一致
+    date_cache.hits += len(codes) - len(uniques)
+    if table.empty:
+        return pd.DataFrame(columns=DATE_HEADERS, index=series.index, dtype=object)
+    return table.take(codes).set_axis(series.index)
+
+
+def build_processed_frame(frame, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, date_cache=None):
+    """pandas 引擎：按列向量化拆分字段，输出列与 build_processed_workbook 相同。"""
+    pd = load_pandas()
+    date_cache = date_cache or DateFieldCache(week_mode)
+    original_headers = [rename_header(header) for header in frame.columns]
+    date_index, order_index, line_index, creative_index = locate_key_columns(original_headers)
+    source = frame.set_axis(original_headers, axis=1).reset_index(drop=True)
+
+    order_column = source.iloc[:, order_index]
+    line_column = source.iloc[:, line_index]
+    creative_column = source.iloc[:, creative_index]
+    order_total_columns, line_total_columns, creative_total_columns = field_totals(
+        max_delimiter_count(order_column, "_"),
+        max_delimiter_count(line_column, "|"),
+        max_delimiter_count(creative_column, "|"),
+    )
+
+    processed = pd.concat(
+        [
+            date_fields_frame(source.iloc[:, date_index], date_cache),
+            order_fields_frame(order_column, order_total_columns),
+            line_fields_frame(line_column, line_total_columns),
+            creative_fields_frame(creative_column, creative_total_columns),
+            source,
+        ],
+        axis=1,
+    )
+    return processed, len(source)
+
+
+def process_workbook(input_path, output_path, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, streaming=True, date_cache=None):
+    if streaming:
+        new_workbook, _ = build_processed_workbook_streaming(input_path, week_mode, date_cache)
+    else:
+        _, load_workbook = load_openpyxl()
+        workbook = load_workbook(input_path)
+        new_workbook, _ = build_processed_workbook(workbook, week_mode, date_cache)
     new_workbook.save(output_path)
 
 
-def process_workbook_bytes(input_bytes, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY):
-    _, load_workbook = load_openpyxl()
-    workbook = load_workbook(io.BytesIO(input_bytes))
-    new_workbook, processed_rows = build_processed_workbook(workbook, week_mode)
+def process_workbook_bytes(input_bytes, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, streaming=True, date_cache=None):
+    if streaming:
+        new_workbook, processed_rows = build_processed_workbook_streaming(io.BytesIO(input_bytes), week_mode, date_cache)
+    else:
+        _, load_workbook = load_openpyxl()
+        workbook = load_workbook(io.BytesIO(input_bytes))
+        new_workbook, processed_rows = build_processed_workbook(workbook, week_mode, date_cache)
     output_buffer = io.BytesIO()
     new_workbook.save(output_buffer)
     output_buffer.seek(0)
     return output_buffer.getvalue(), processed_rows
 
 
+def report_format(file_name):
+    extension = os.path.splitext(file_name)[1].lower().lstrip(".")
+    if extension not in ("xlsx", "csv"):
+        raise ValueError(f"不支持的文件类型：{file_name}（仅支持 .xlsx / .csv）")
+    return extension
+
+
+def read_csv_report(input_file):
+    # 先只读表头定位关键列，按文本读取这四列（避免 Order 等被推断为数字），其余列保留类型推断
+    pd = load_pandas()
+    headers = pd.read_csv(input_file, nrows=0, encoding="utf-8-sig").columns
+    key_indexes = locate_key_columns([rename_header(header) for header in headers])
+    input_file.seek(0)
+    return pd.read_csv(input_file, encoding="utf-8-sig", dtype={index: str for index in key_indexes})
+
+
+def load_report_frame(input_bytes, file_name):
+    if report_format(file_name) == "csv":
+        return read_csv_report(io.BytesIO(input_bytes))
+    return load_pandas().read_excel(io.BytesIO(input_bytes), engine="openpyxl")
+
+
+def parquet_frame(frame):
+    # Parquet 要求每列类型一致：空字符串视为缺失，仍混合类型的列（如未解析的 Day）转为文本
+    pd = load_pandas()
+    frame = dedupe_columns(frame).copy()
+    # 派生的 Year / Month 为整数（无法解析的日期为空），用可空整数避免写成 2024.0
+    for column in ("Year", "Month"):
+        if column in frame.columns:
+            frame[column] = pd.to_numeric(frame[column].where(frame[column] != "", None), errors="coerce").astype("Int64")
+    for column in frame.columns[frame.dtypes == object]:
+        values = frame[column].where(frame[column] != "", None)
+        if pd.api.types.infer_dtype(values, skipna=True).startswith("mixed"):
+            values = values.map(lambda value: None if value is None else str(value))
+        frame[column] = values
+    return frame
+
+
+def write_processed_frame(frame, output_format):
+    if output_format == "xlsx" and len(frame) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(
+            f"结果共 {len(frame)} 行，超过 Excel 单个工作表上限（{EXCEL_MAX_ROWS - 1} 行数据），请改用 csv / parquet 输出。"
+        )
+    output_buffer = io.BytesIO()
+    if output_format == "csv":
+        frame.to_csv(output_buffer, index=False, encoding="utf-8-sig")
+    elif output_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as exc:
+            raise ImportError("缺少 pyarrow，请先运行：pip3 install pyarrow") from exc
+        parquet_frame(frame).to_parquet(output_buffer, index=False)
+    else:
+        pd = load_pandas()
+        with pd.ExcelWriter(output_buffer, engine="openpyxl") as writer:
+            frame.to_excel(writer, index=False, freeze_panes=(1, 0))
+            # 与 openpyxl 引擎输出一致：Day 列按 DATE_NUMBER_FORMAT 显示
+            if "Day" in frame.columns:
+                worksheet = next(iter(writer.sheets.values()))
+                day_column = list(frame.columns).index("Day") + 1
+                for (cell,) in worksheet.iter_rows(min_row=2, min_col=day_column, max_col=day_column):
+                    if cell.is_date:
+                        cell.number_format = DATE_NUMBER_FORMAT
+    return output_buffer.getvalue()
+
+
+def process_report_bytes(input_bytes, file_name, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, output_format="xlsx", date_cache=None):
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式：{output_format}")
+    # xlsx → xlsx 走 openpyxl 流式处理以保留单元格格式；其余组合走 pandas 引擎，CSV 输入完全不经过 openpyxl
+    if report_format(file_name) == "xlsx" and output_format == "xlsx":
+        return process_workbook_bytes(input_bytes, week_mode, date_cache=date_cache)
+    processed, processed_rows = build_processed_frame(load_report_frame(input_bytes, file_name), week_mode, date_cache)
+    return write_processed_frame(processed, output_format), processed_rows
+
+
+def process_report(input_path, output_path, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, date_cache=None):
+    # 输入/输出格式按扩展名判断
+    output_format = os.path.splitext(output_path)[1].lower().lstrip(".")
+    with open(input_path, "rb") as input_file:
+        input_bytes = input_file.read()
+    output_bytes, processed_rows = process_report_bytes(
+        input_bytes, os.path.basename(input_path), week_mode, output_format, date_cache
+    )
+    with open(output_path, "wb") as output_file:
+        output_file.write(output_bytes)
+    return processed_rows
+
+
+def expand_batch_inputs(files):
+    # files: [(文件名, 字节)]，ZIP 中的 .xlsx / .csv 会被展开
+    items = []
+    for name, data in files:
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or member.filename.startswith("__MACOSX/"):
+                        continue
+                    base_name = os.path.basename(member.filename)
+                    if base_name.lower().endswith((".xlsx", ".csv")) and not base_name.startswith("~$"):
+                        items.append((base_name, archive.read(member)))
+        else:
+            items.append((name, data))
+    return items
+
+
+def processed_file_name(source_name, used_names, output_format="xlsx"):
+    base_name = os.path.splitext(source_name)[0]
+    output_name = f"{base_name}_processed.{output_format}"
+    suffix = 2
+    while output_name in used_names:
+        output_name = f"{base_name}_processed_{suffix}.{output_format}"
+        suffix += 1
+    used_names.add(output_name)
+    return output_name
+
+
+def process_batch_item(name, data, week_mode, with_frame=False, output_format="xlsx"):
+    # with_frame（合并输出）时每个文件只解析一次：单文件输出与合并用的 DataFrame 都由同一个结果生成
+    started = time.perf_counter()
+    date_cache = DateFieldCache(week_mode)
+    try:
+        frame = None
+        if with_frame:
+            if output_format not in OUTPUT_FORMATS:
+                raise ValueError(f"不支持的输出格式：{output_format}")
+            frame, processed_rows = build_processed_frame(load_report_frame(data, name), week_mode, date_cache)
+            output_bytes = write_processed_frame(frame, output_format)
+            frame = dedupe_columns(frame)
+            frame.insert(0, "Source File", name)
+        else:
+            output_bytes, processed_rows = process_report_bytes(data, name, week_mode, output_format, date_cache)
+        error = None
+    except Exception as exc:
+        output_bytes, processed_rows, frame, error = None, 0, None, str(exc)
+    return {
+        "name": name,
+        "output": output_bytes,
+        "rows": processed_rows,
+        "seconds": time.perf_counter() - started,
+        "error": error,
+        "frame": frame,
+    }
+
+
+def batch_worker_module():
+    # streamlit run 时本文件是 __main__，spawn 子进程需要按模块名导入工作函数
+    if __name__ == "__main__":
+        import Report_Field_Organization_for_DSP as module
+
+        return module
+    return sys.modules[__name__]
+
+
+def dedupe_columns(frame):
+    seen = {}
+    columns = []
+    for column in frame.columns:
+        count = seen.get(column, 0)
+        columns.append(column if count == 0 else f"{column}.{count}")
+        seen[column] = count + 1
+    return frame.set_axis(columns, axis=1)
+
+
+def process_batch(files, week_mode=WEEK_MODE_SUNDAY_TO_SATURDAY, combined=False, max_workers=None, output_format="xlsx"):
+    # 返回 (ZIP 字节, 合并文件字节, 合并文件格式, 每个文件的结果)；合并后超过 Excel 行数上限时合并文件改为 csv
+    items = expand_batch_inputs(files)
+    if not items:
+        raise ValueError("未找到可处理的 .xlsx / .csv 文件。")
+
+    max_workers = max(1, min(max_workers or BATCH_MAX_WORKERS, len(items)))
+    if max_workers == 1:
+        results = [process_batch_item(name, data, week_mode, combined, output_format) for name, data in items]
+    else:
+        worker = batch_worker_module().process_batch_item
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(worker, name, data, week_mode, combined, output_format) for name, data in items]
+            results = [future.result() for future in futures]
+
+    zip_buffer = io.BytesIO()
+    used_names = set()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for result in results:
+            output_bytes = result.pop("output")
+            if output_bytes is not None:
+                result["output_name"] = processed_file_name(result["name"], used_names, output_format)
+                archive.writestr(result["output_name"], output_bytes)
+
+    frames = [frame for frame in (result.pop("frame") for result in results) if frame is not None]
+    combined_bytes = None
+    combined_format = output_format
+    if combined and frames:
+        if output_format == "xlsx" and sum(len(frame) for frame in frames) + 1 > EXCEL_MAX_ROWS:
+            combined_format = "csv"
+        combined_frame = load_pandas().concat(frames, ignore_index=True)
+        frames.clear()
+        combined_bytes = write_processed_frame(combined_frame, combined_format)
+
+    return zip_buffer.getvalue(), combined_bytes, combined_format, results
+
+
 def inject_styles():
     st.markdown(
         f"""
@@ -366,7 +855,7 @@ def streamlit_app():
     inject_styles()
 
     st.title("广告报表字段拆分")
-    st.caption("上传 `.xlsx` 文件，自动拆分 Date / Order / Line item / Creative 字段并下载处理结果。")
+    st.caption("上传 `.xlsx` / `.csv` 文件，自动拆分 Date / Order / Line item / Creative 字段并下载处理结果。")
     week_mode_label = st.selectbox(
         "周定义",
         options=["周一到周日", "周日到周六"],
@@ -378,35 +867,114 @@ def streamlit_app():
         if week_mode_label == "周一到周日"
         else WEEK_MODE_SUNDAY_TO_SATURDAY
     )
+    output_format = st.selectbox(
+        "输出格式",
+        options=list(OUTPUT_FORMATS),
+        index=0,
+        help="大文件建议选择 csv / parquet，处理时不经过 openpyxl，速度更快。",
+    )
+
+    batch_mode = st.toggle("批量处理（多个文件或 ZIP）", value=False)
+    if batch_mode:
+        render_batch_mode(week_mode, output_format)
+        return
 
-    uploaded_file = st.file_uploader("上传广告报表", type=["xlsx"])
+    uploaded_file = st.file_uploader("上传广告报表", type=["xlsx", "csv"])
     if uploaded_file is None:
-        st.info("请先上传一个 Excel 文件。")
+        st.info("请先上传一个 Excel 或 CSV 文件。")
         return
 
     source_name = uploaded_file.name
     base_name = os.path.splitext(source_name)[0]
-    output_name = f"{base_name}_processed.xlsx"
+    output_name = f"{base_name}_processed.{output_format}"
 
     st.write(f"当前文件：`{source_name}`")
 
     if st.button("开始处理", type="primary", use_container_width=True):
         try:
+            date_cache = DateFieldCache(week_mode)
             with st.spinner("正在处理，请稍候..."):
-                output_bytes, processed_rows = process_workbook_bytes(uploaded_file.getvalue(), week_mode)
+                output_bytes, processed_rows = process_report_bytes(
+                    uploaded_file.getvalue(), source_name, week_mode, output_format, date_cache
+                )
         except Exception as exc:
             st.error(f"处理失败：{exc}")
             return
 
         st.success(f"处理完成，共处理 {processed_rows} 行数据。")
+        st.caption(date_cache.summary())
         st.download_button(
             label="下载处理后的文件",
             data=output_bytes,
             file_name=output_name,
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            mime=OUTPUT_FORMATS[output_format],
+            type="primary",
+            use_container_width=True,
+        )
+
+
+def render_batch_mode(week_mode, output_format="xlsx"):
+    uploaded_files = st.file_uploader("上传广告报表", type=["xlsx", "csv", "zip"], accept_multiple_files=True)
+    if not uploaded_files:
+        st.info("请上传多个 Excel / CSV 文件，或包含这些文件的 ZIP。")
+        return
+
+    combined = st.checkbox(
+        "同时生成合并文件（所有文件合并为一个工作表）",
+        value=False,
+        help="开启后每个文件只解析一次，单文件结果也由 pandas 引擎生成（不保留原表单元格格式）。",
+    )
+    st.write(f"已选择 {len(uploaded_files)} 个文件，最多 {BATCH_MAX_WORKERS} 个进程并行处理。")
+
+    if st.button("开始批量处理", type="primary", use_container_width=True):
+        started = time.perf_counter()
+        try:
+            with st.spinner("正在批量处理，请稍候..."):
+                zip_bytes, combined_bytes, combined_format, results = process_batch(
+                    [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files],
+                    week_mode,
+                    combined=combined,
+                    output_format=output_format,
+                )
+        except Exception as exc:
+            st.error(f"处理失败：{exc}")
+            return
+
+        failed = [result for result in results if result["error"]]
+        st.success(
+            f"处理完成：{len(results) - len(failed)}/{len(results)} 个文件成功，"
+            f"共 {sum(result['rows'] for result in results)} 行，耗时 {time.perf_counter() - started:.1f}s。"
+        )
+        st.dataframe(
+            [
+                {
+                    "文件": result["name"],
+                    "行数": result["rows"],
+                    "耗时 (s)": round(result["seconds"], 2),
+                    "状态": "失败：" + result["error"] if result["error"] else "成功",
+                }
+                for result in results
+            ],
+            use_container_width=True,
+        )
+        st.download_button(
+            label="下载处理结果 (ZIP)",
+            data=zip_bytes,
+            file_name="dsp_processed.zip",
+            mime="application/zip",
             type="primary",
             use_container_width=True,
         )
+        if combined_bytes is not None:
+            if combined_format != output_format:
+                st.warning(f"合并结果超过 Excel 单个工作表上限（{EXCEL_MAX_ROWS - 1} 行数据），合并文件改为 {combined_format} 输出。")
+            st.download_button(
+                label="下载合并文件",
+                data=combined_bytes,
+                file_name=f"dsp_processed_combined.{combined_format}",
+                mime=OUTPUT_FORMATS[combined_format],
+                use_container_width=True,
+            )
 
 
 if __name__ == "__main__":
@@ -1,54 +1,29 @@
+from __future__ import annotations
+
+import importlib
+import sys
+import time
 import streamlit as st
-import pandas as pd
 import os
-import re
 from datetime import datetime
 import io
-import zipfile
-import tempfile
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-import plotly.express as px
 from uuid import uuid4
-from typing import Callable, List, Any, Dict
+from typing import TYPE_CHECKING, Callable
 from datetime import timedelta
 
-# 导入子程序模块
-try:
-    from sub_module_sales_merge import sales_data_merge_app
-except ImportError:
-    def sales_data_merge_app():
-        st.error("模块 'sub_module_sales_merge' 未找到")
-
-try:
-    from sub_module_merge import merge_data_app
-except ImportError:
-    def merge_data_app():
-        st.error("模块 'sub_module_merge' 未找到")
-
-try:
-    from sub_module_search_insight import search_insight_app
-except ImportError:
-    def search_insight_app():
-        st.error("模块 'sub_module_search_insight' 未找到")
-
-try:
-    from sub_module_visualization import search_insight_viz_app
-except ImportError:
-    def search_insight_viz_app():
-        st.error("模块 'sub_module_visualization' 未找到")
+if TYPE_CHECKING:
+    import pandas as pd
+    from openpyxl import Workbook
 
-try:
-    from sub_module_data_clean import data_clean_app
-except ImportError:
-    def data_clean_app():
-        st.error("模块 'sub_module_data_clean' 未找到")
-
-try:
-    from sub_module_pack_form import pack_form_labeler_app
-except ImportError:
-    def pack_form_labeler_app():
-        st.error("模块 'sub_module_pack_form' 未找到")
+# 功能导航：(标签, 子程序模块, 入口函数)，只在选中时才导入对应模块
+TAB_ROUTES = [
+    ("🔗 销售数据合并", "sub_module_sales_merge", "sales_data_merge_app"),
+    ("📊 合并数据表格", "sub_module_merge", "merge_data_app"),
+    ("🔍 搜索流量洞察", "sub_module_search_insight", "search_insight_app"),
+    ("📈 流量可视化分析", "sub_module_visualization", "search_insight_viz_app"),
+    ("🧹 数据清理工具", "sub_module_data_clean", "data_clean_app"),
+    ("🏷️ 剂型打标工具", "sub_module_pack_form", "pack_form_labeler_app"),
+]
 
 # App configuration
 APP_CONFIG = {
@@ -68,10 +43,6 @@ def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
     ext = ext or default_ext
     return os.path.join("/tmp", f"{base}_{st.session_state.SID}_{uuid4().hex[:8]}{ext}")
 
-@st.cache_data(ttl=1800, show_spinner=False)
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
-
 # === Shared UI/render helpers ===
 def render_app_header(emoji_title: str, subtitle: str):
     st.markdown(f"""
@@ -134,7 +105,24 @@ def render_download_section(
             use_container_width=True,
         )
 
+def render_tab(module_name: str, func_name: str) -> float | None:
+    """导入并渲染选中的子程序；返回本次首次导入模块的耗时（已导入时为 None）"""
+    import_seconds = None
+    try:
+        if module_name not in sys.modules:
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            import_seconds = time.perf_counter() - start
+        else:
+            module = sys.modules[module_name]
+    except ImportError:
+        st.error(f"模块 '{module_name}' 未找到")
+        return None
+    getattr(module, func_name)()
+    return import_seconds
+
 def main():
+    render_start = time.perf_counter()
     st.set_page_config(page_title=APP_CONFIG["app_title"], layout="wide", page_icon="📊", initial_sidebar_state="collapsed")
     
     if "active_users" not in st.session_state:
@@ -232,19 +220,10 @@ def main():
         <p style="color: #666; margin-bottom: 0;">选择下方功能模块开始您的数据分析之旅</p>
     </div>
     """, unsafe_allow_html=True)
-    tabs = st.tabs(["🔗 销售数据合并", "📊 合并数据表格", "🔍 搜索流量洞察", "📈 流量可视化分析", "🧹 数据清理工具", "🏷️ 剂型打标工具"])
-    with tabs[0]:
-        sales_data_merge_app()
-    with tabs[1]:
-        merge_data_app()
-    with tabs[2]:
-        search_insight_app()
-    with tabs[3]:
-        search_insight_viz_app()
-    with tabs[4]:
-        data_clean_app()
-    with tabs[5]:
-        pack_form_labeler_app()
+    labels = [label for label, _, _ in TAB_ROUTES]
+    selected = st.radio("功能模块", labels, horizontal=True, key="active_tab", label_visibility="collapsed")
+    _, module_name, func_name = TAB_ROUTES[labels.index(selected)]
+    import_seconds = render_tab(module_name, func_name)
     st.divider()
     st.markdown("""
     <div style="text-align: center; color: #666; padding: 2rem 0;">
@@ -252,6 +231,10 @@ def main():
         <p style="margin: 0.5rem 0 0 0; font-size: 13px;">Data Cleansing for Market Insights - Making data analysis simpler</p>
     </div>
     """, unsafe_allow_html=True)
+    timing = f"⏱️ 本次渲染 {time.perf_counter() - render_start:.2f}s"
+    if import_seconds is not None:
+        timing += f"（首次加载模块 {import_seconds:.2f}s）"
+    st.caption(timing)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,153 @@
+"""上传清洗性能对比：旧版逐列清洗 与 按表结构生成转换计划（build_conversion_plan / apply_conversion_plan）
+
+用法: python clean_benchmark.py [--rows N] [--cols N] [--distinct N]，默认 1,000,000 行 × 40 列；
+数据为模拟的 CSV 上传（数值/日期以文本读入、带首尾空格的字符串、缺失值、已是数值类型的列），
+--distinct 为每列不同取值的个数（新版只转换去重后的值，取值越少提速越明显）
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from philipsdatabase import (apply_conversion_plan, basic_clean_data, build_conversion_plan,
+                             clean_string_column, convert_unique_values)
+
+BENCHMARK_CONFIG = {
+    'rows': 1000000,
+    'cols': 40,
+    'distinct': 1000,
+}
+
+
+def _numeric_text(rng, rows, distinct):
+    pool = np.array([f"{v:.4f}" for v in rng.random(distinct) * 1000] + [None, ''], dtype=object)
+    return pool[rng.integers(0, len(pool), rows)]
+
+
+def _date_text(rng, rows, distinct):
+    days = pd.date_range('2000-01-01', periods=min(distinct, 20000), freq='D').strftime('%Y-%m-%d').tolist()
+    pool = np.array(days + [None], dtype=object)
+    return pool[rng.integers(0, len(pool), rows)]
+
+
+def _padded_text(rng, rows, distinct):
+    pool = np.array([f"  item {i} " for i in range(distinct)] + [None], dtype=object)
+    return pool[rng.integers(0, len(pool), rows)]
+
+
+def _native_float(rng, rows, distinct):
+    values = rng.random(rows) * 100
+    values[rng.random(rows) < 0.05] = np.nan
+    return values
+
+
+# 列类型按此顺序循环：(ClickHouse 类型, 生成函数)
+COLUMN_KINDS = [
+    ('Nullable(Float64)', _numeric_text),
+    ('Date', _date_text),
+    ('String', _padded_text),
+    ('Int64', _native_float),
+]
+
+
+def generated_frame(rows: int, cols: int, distinct: int) -> tuple[pd.DataFrame, dict]:
+    rng = np.random.default_rng(0)
+    data, col_type_map = {}, {}
+    for i in range(cols):
+        db_type, make = COLUMN_KINDS[i % len(COLUMN_KINDS)]
+        name = f"col_{i:02d}"
+        data[name] = make(rng, rows, distinct)
+        col_type_map[name] = db_type
+    return pd.DataFrame(data), col_type_map
+
+
+def legacy_clean_data(df, col_type_map):
+    """旧版 clean_data：每列按类型整列转换，字符串列用 'nan' 文本替换空值"""
+    for col in df.columns:
+        if col not in col_type_map:
+            continue
+        db_type = col_type_map[col].lower()
+        if any(t in db_type for t in ['int', 'float', 'decimal', 'double']):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        elif any(t in db_type for t in ['date', 'datetime', 'timestamp']):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        elif any(t in db_type for t in ['string', 'char', 'varchar', 'text']):
+            df[col] = df[col].astype(str).str.strip().replace('nan', '')
+    return df
+
+
+def legacy_basic_clean_data(df):
+    """旧版 basic_clean_data：每列整列试转数值判断类型"""
+    for col in df.columns:
+        try:
+            numeric_series = pd.to_numeric(df[col], errors='coerce')
+            if numeric_series.notna().mean() > 0.5:
+                df[col] = numeric_series
+            else:
+                df[col] = df[col].astype(str).str.strip()
+        except Exception:
+            df[col] = df[col].astype(str).str.strip()
+    return df
+
+
+# 去重转换必须与整列直接转换结果一致：混合 int / float / bool 的列哈希相等但文本不同
+MIXED_TYPE_CASES = {
+    'int/float': [1001.0, 1001, 'x'] * 5000,
+    'int/bool': [1, True, 2] * 10000,
+    'float/bool/None': [0.0, False, None, 'a'] * 5000,
+}
+
+
+def check_mixed_types() -> list[str]:
+    converters = {
+        'numeric': lambda s: pd.to_numeric(s, errors='coerce'),
+        'string': clean_string_column,
+    }
+    failures = []
+    for case, values in MIXED_TYPE_CASES.items():
+        series = pd.Series(values, dtype=object)
+        for kind, convert in converters.items():
+            if not convert_unique_values(series, convert).equals(convert(series)):
+                failures.append(f"{case} ({kind})")
+    return failures
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def report(label, before_seconds, after_seconds):
+    print(f"{label:<28} 旧版 {before_seconds:7.2f}s  新版 {after_seconds:7.2f}s  提速 {before_seconds / after_seconds:5.1f}x")
+
+
+def main(rows: int, cols: int, distinct: int) -> int:
+    failures = check_mixed_types()
+    print(f"[{'OK ' if not failures else 'FAIL'}] 混合类型列去重转换与整列转换一致")
+    for failure in failures:
+        print(f"  不一致: {failure}")
+
+    frame, col_type_map = generated_frame(rows, cols, distinct)
+    print(f"数据: {rows:,} 行 × {cols} 列，每列约 {distinct:,} 个不同值")
+
+    _, before = timed(legacy_clean_data, frame.copy(), col_type_map)
+    _, after = timed(lambda df: apply_conversion_plan(df, build_conversion_plan(df, col_type_map)), frame.copy())
+    report('clean_data（按表结构）', before, after)
+
+    _, before = timed(legacy_basic_clean_data, frame.copy())
+    _, after = timed(basic_clean_data, frame.copy())
+    report('basic_clean_data（无表结构）', before, after)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    def _arg(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    sys.exit(main(
+        int(_arg('--rows', BENCHMARK_CONFIG['rows'])),
+        int(_arg('--cols', BENCHMARK_CONFIG['cols'])),
+        int(_arg('--distinct', BENCHMARK_CONFIG['distinct'])),
+    ))
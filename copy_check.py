@@ -0,0 +1,172 @@
+"""PostgreSQL COPY 写入检查：在本地 PostgreSQL 上验证 copy_dataframe 的正确性，并与分批 INSERT 回退对比吞吐
+
+用法: python copy_check.py [--rows N] [--insert-rows N] [--dsn URL]
+DSN 默认取环境变量 COPY_CHECK_DSN；检查使用临时表，结束后删除。任一检查不通过时以非零状态退出
+"""
+import os
+import sys
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import postgre_client
+
+CHECK_CONFIG = {
+    'dsn': os.environ.get('COPY_CHECK_DSN', 'postgresql+psycopg2://postgres@localhost:5432/postgres'),
+    'rows': 1000000,
+    'insert_rows': 100000,  # 分批 INSERT 很慢，只测一部分行数，按吞吐对比
+    'table': f'copy_check_{os.getpid()}',
+}
+
+COLUMNS_SQL = """(
+    id bigint,
+    qty integer,
+    price numeric(12, 2),
+    ratio double precision,
+    day date,
+    name text,
+    note varchar(50)
+)"""
+
+
+def _column_types(engine, table_name):
+    query = text("SELECT column_name, data_type FROM information_schema.columns WHERE table_name = :t")
+    with engine.connect() as conn:
+        return dict(conn.execute(query, {'t': table_name}).all())
+
+
+def _reset_table(engine, table_name):
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+        conn.execute(text(f"CREATE TABLE {table_name} {COLUMNS_SQL}"))
+
+
+def _read_back(engine, table_name):
+    with engine.connect() as conn:
+        return pd.read_sql(text(f"SELECT * FROM {table_name} ORDER BY id"), conn)
+
+
+def edge_case_frame():
+    """NULL / 空字符串 / 字面量 \\N / 转义字符 / 含空值的整数列（float64 → Int64）"""
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 6],
+        'qty': [1.0, np.nan, 3.0, 4.0, 5.0, 6.0],
+        'price': ['1.50', '', '  ', None, 2, 3.25],
+        'ratio': [0.5, np.nan, 1.0, 2.0, 3.0, 4.0],
+        'day': ['2024-01-31', '', None, date(2024, 2, 1), '2024-03-01', '2024-03-02'],
+        'name': ['\\N', '', None, 'tab\there', 'line\nbreak', 'back\\slash "quoted" 中文'],
+        'note': ['a', 'b', '', None, 'e', 'f'],
+    })
+
+
+def expected_edge_case():
+    return pd.DataFrame({
+        'id': [1, 2, 3, 4, 5, 6],
+        'qty': [1, None, 3, 4, 5, 6],
+        'price': [1.5, None, None, None, 2.0, 3.25],
+        'ratio': [0.5, None, 1.0, 2.0, 3.0, 4.0],
+        'day': [date(2024, 1, 31), None, None, date(2024, 2, 1), date(2024, 3, 1), date(2024, 3, 2)],
+        'name': ['\\N', '', None, 'tab\there', 'line\nbreak', 'back\\slash "quoted" 中文'],
+        'note': ['a', 'b', '', None, 'e', 'f'],
+    })
+
+
+def check_edge_cases(engine, table_name) -> list[str]:
+    _reset_table(engine, table_name)
+    postgre_client.copy_dataframe(engine, table_name, edge_case_frame(), column_types=_column_types(engine, table_name))
+    actual = _read_back(engine, table_name)
+    expected = expected_edge_case()
+
+    failures = []
+    for col in expected.columns:
+        for row, (got, want) in enumerate(zip(actual[col], expected[col])):
+            got = None if pd.isna(got) else (float(got) if col in ('price', 'ratio') else got)
+            want = None if pd.isna(want) else want
+            if got != want:
+                failures.append(f"{col}[{row}]: 期望 {want!r}，实际 {got!r}")
+    return failures
+
+
+def generated_frame(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    qty = rng.integers(0, 1000, rows).astype(float)
+    qty[rng.random(rows) < 0.05] = np.nan
+    names = np.array(['alpha', 'beta', 'gamma', '\\N', '', 'tab\tx'], dtype=object)
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'qty': qty,
+        'price': np.round(rng.random(rows) * 100, 2),
+        'ratio': np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows)),
+        'day': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+        'name': names[rng.integers(0, len(names), rows)],
+        'note': np.where(rng.random(rows) < 0.1, None, 'note'),
+    })
+
+
+def table_digest(engine, table_name) -> tuple:
+    query = text(f"""SELECT count(*), count(qty), sum(qty), sum(price), count(ratio), count(name),
+       sum(length(name)), count(*) FILTER (WHERE name = '\\N'), count(note), min(day), max(day)
+FROM {table_name}""")
+    with engine.connect() as conn:
+        return tuple(conn.execute(query).one())
+
+
+def timed(write) -> float:
+    start = time.perf_counter()
+    write()
+    return time.perf_counter() - start
+
+
+def main(rows: int, insert_rows: int, dsn: str) -> int:
+    engine = create_engine(dsn)
+    table_name = CHECK_CONFIG['table']
+    failures = []
+    try:
+        edge_failures = check_edge_cases(engine, table_name)
+        print(f"[{'OK ' if not edge_failures else 'FAIL'}] 边界值（NULL / 空字符串 / \\N / 转义 / Int64）")
+        failures += edge_failures
+
+        frame = generated_frame(rows)
+        column_types = _column_types(engine, table_name)
+        _reset_table(engine, table_name)
+        copy_seconds = timed(lambda: postgre_client.copy_dataframe(engine, table_name, frame, column_types=column_types))
+        copy_digest = table_digest(engine, table_name)
+        if copy_digest[0] != rows:
+            failures.append(f"COPY 行数 {copy_digest[0]} != {rows}")
+        print(f"[INFO] COPY      {rows:>9} 行 {copy_seconds:8.1f}s  {rows / copy_seconds:>12,.0f} 行/秒")
+
+        # 同一批数据分别用 COPY 与 INSERT 写入，结果应完全一致
+        sample = frame.iloc[:insert_rows]
+        _reset_table(engine, table_name)
+        postgre_client.copy_dataframe(engine, table_name, sample, column_types=column_types)
+        sample_digest = table_digest(engine, table_name)
+        _reset_table(engine, table_name)
+        insert_seconds = timed(lambda: postgre_client.insert_dataframe(engine, table_name, sample))
+        insert_digest = table_digest(engine, table_name)
+        print(f"[INFO] INSERT    {len(sample):>9} 行 {insert_seconds:8.1f}s  {len(sample) / insert_seconds:>12,.0f} 行/秒")
+        if insert_digest != sample_digest:
+            failures.append(f"COPY 与 INSERT 结果不一致: {sample_digest} != {insert_digest}")
+        print(f"[{'OK ' if insert_digest == sample_digest else 'FAIL'}] COPY 与 INSERT 写入结果一致")
+        print(f"[INFO] 吞吐提升 {(rows / copy_seconds) / (len(sample) / insert_seconds):.1f}x")
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+        engine.dispose()
+
+    for failure in failures:
+        print(f"  {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    def _arg(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    sys.exit(main(
+        int(_arg('--rows', CHECK_CONFIG['rows'])),
+        int(_arg('--insert-rows', CHECK_CONFIG['insert_rows'])),
+        _arg('--dsn', CHECK_CONFIG['dsn']),
+    ))
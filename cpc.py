@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+from file_io import read_excel_cached
 
 st.set_page_config(page_title="CPC计算器", page_icon="💰", layout="wide")
 
@@ -253,7 +254,7 @@ with tab2:
         try:
             # ========== 处理文件1 ==========
             st.markdown("### 📋 文件1预览（前10行）")
-            df1_raw = pd.read_excel(file1, header=None)
+            df1_raw = read_excel_cached(file1, header=None)
             st.dataframe(df1_raw.head(10), use_container_width=True)
             
             # 让用户选择文件1的表头行和列
@@ -270,7 +271,7 @@ with tab2:
                 )
             
             # 重新读取文件1，指定表头行
-            df1 = pd.read_excel(file1, header=header_row_1)
+            df1 = read_excel_cached(file1, header=header_row_1)
             
             with col2:
                 keyword_col = st.selectbox(
@@ -290,7 +291,7 @@ with tab2:
             
             # ========== 处理文件2 ==========
             st.markdown("### 📋 文件2预览（前10行）")
-            df2_raw = pd.read_excel(file2, header=None)
+            df2_raw = read_excel_cached(file2, header=None)
             st.dataframe(df2_raw.head(10), use_container_width=True)
             
             # 让用户选择文件2的表头行和列
@@ -307,7 +308,7 @@ with tab2:
                 )
             
             # 重新读取文件2，指定表头行
-            df2 = pd.read_excel(file2, header=header_row_2)
+            df2 = read_excel_cached(file2, header=header_row_2)
             
             with col2:
                 keyword_col_2 = st.selectbox(
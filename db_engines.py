@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import Counter
+
+from sqlalchemy import create_engine, event
+
+# 连接池配置：pool_pre_ping 在借出前探活，避免使用被服务端断开的连接
+ENGINE_POOL_CONFIG = {
+    'pool_size': 5,
+    'max_overflow': 5,
+    'pool_recycle': 1800,
+    'pool_pre_ping': True,
+}
+
+_engines = {}
+_lock = threading.Lock()
+_connects = Counter()
+_checkouts = Counter()
+
+
+def get_engine(name: str, url: str, **kwargs):
+    """按名称缓存的 SQLAlchemy 引擎（进程级单例，Streamlit 重跑、不同会话共享同一连接池）"""
+    with _lock:
+        engine = _engines.get(name)
+        if engine is None:
+            engine = create_engine(url, **{**ENGINE_POOL_CONFIG, **kwargs})
+
+            @event.listens_for(engine, 'connect')
+            def _on_connect(dbapi_conn, record):
+                _connects[name] += 1
+
+            @event.listens_for(engine, 'checkout')
+            def _on_checkout(dbapi_conn, record, proxy):
+                _checkouts[name] += 1
+
+            _engines[name] = engine
+        return engine
+
+
+def connection_counts() -> dict:
+    """各引擎累计的 {名称: (新建物理连接数, 借出次数)}，取两次快照之差即为一次操作的开销"""
+    with _lock:
+        return {name: (_connects[name], _checkouts[name]) for name in _engines}
+
+
+def diff_counts(before: dict, after: dict) -> dict:
+    return {
+        name: (opened - before.get(name, (0, 0))[0], used - before.get(name, (0, 0))[1])
+        for name, (opened, used) in after.items()
+    }
+
+
+def dispose_all():
+    """关闭所有连接池（数据库切换或连接异常后重建）"""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+# 表结构缓存配置：同一张表的列信息在 TTL 内只查询一次，上传前显式失效
+SCHEMA_CACHE_CONFIG = {
+    'ttl_seconds': 300,
+}
+
+
+class SchemaCache:
+    """表结构元数据缓存：key → loader(key) 的结果（列名、类型、位置），按 TTL 过期"""
+
+    def __init__(self, loader, ttl_seconds: int = None):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds or SCHEMA_CACHE_CONFIG['ttl_seconds']
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # 查询放在锁外，避免慢查询阻塞其他表；加载失败不缓存
+        value = self.loader(key)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
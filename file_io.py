@@ -0,0 +1,228 @@
+import hashlib
+import io
+import os
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+
+import pandas as pd
+
+# 缓存配置：按解析后 DataFrame 的内存占用总量限制，超出后按 LRU 淘汰；为 0 时不缓存
+CACHE_CONFIG = {
+    'max_bytes': int(os.environ.get('FILE_IO_CACHE_MB', 1024)) * 1024 * 1024,
+}
+
+# Excel 读取引擎：auto（已安装 python-calamine 时使用 calamine，否则 openpyxl）/ calamine / openpyxl
+READER_CONFIG = {
+    'excel_engine': os.environ.get('EXCEL_READER_ENGINE', 'auto'),
+}
+
+
+def calamine_available() -> bool:
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def resolve_excel_engine(engine=None):
+    """解析 Excel 读取引擎：显式指定优先，其次按 READER_CONFIG；返回 None 时由 pandas 按扩展名选择 openpyxl / xlrd"""
+    if engine and engine != 'calamine':
+        return engine
+    configured = engine or READER_CONFIG['excel_engine']
+    if configured in ('auto', 'calamine') and calamine_available():
+        return 'calamine'
+    return None
+
+
+def read_excel(file_or_path, sheet_name=0, engine=None, **kwargs):
+    """pd.read_excel 的统一入口，calamine 解析失败时自动回退 openpyxl / xlrd"""
+    resolved = resolve_excel_engine(engine)
+    if resolved == 'calamine':
+        try:
+            return pd.read_excel(file_or_path, sheet_name=sheet_name, engine='calamine', **kwargs)
+        except Exception:
+            if hasattr(file_or_path, 'seek'):
+                file_or_path.seek(0)
+            resolved = None
+    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=resolved, **kwargs)
+
+
+def active_sheet_index(data: bytes) -> int:
+    """xlsx 的活动工作表序号（xl/workbook.xml 中 workbookView 的 activeTab），与 openpyxl 的 wb.active 一致；无法判断时为 0"""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            workbook_xml = archive.read('xl/workbook.xml')
+    except (zipfile.BadZipFile, KeyError):
+        return 0
+    match = re.search(rb'<(?:\w+:)?workbookView\b[^>]*\bactiveTab="(\d+)"', workbook_xml)
+    return int(match.group(1)) if match else 0
+
+
+def iter_excel_rows(file_or_path, max_col=None, min_row=1):
+    """按行读取活动工作表的单元格值（空单元格为 None），不构建 DataFrame"""
+    if resolve_excel_engine() == 'calamine':
+        from python_calamine import CalamineWorkbook
+        data = _read_bytes(file_or_path)
+        wb = CalamineWorkbook.from_filelike(io.BytesIO(data))
+        # calamine 没有"活动工作表"接口，按 workbook.xml 中的 activeTab 取，与 openpyxl 分支读取同一张表
+        rows = wb.get_sheet_by_index(active_sheet_index(data)).to_python(skip_empty_area=False)
+        for row in rows[min_row - 1:]:
+            row = [None if v == '' else v for v in row[:max_col]]
+            if max_col and len(row) < max_col:
+                row.extend([None] * (max_col - len(row)))
+            yield tuple(row)
+        return
+
+    from openpyxl import load_workbook
+    wb = load_workbook(file_or_path, read_only=True, data_only=True)
+    try:
+        yield from wb.active.iter_rows(min_row=min_row, max_col=max_col, values_only=True)
+    finally:
+        wb.close()
+
+
+def _read_bytes(file_or_path):
+    """读取上传文件 / 路径 / 类文件对象的完整字节内容"""
+    if isinstance(file_or_path, (bytes, bytearray)):
+        return bytes(file_or_path)
+    if isinstance(file_or_path, (str, os.PathLike)):
+        with open(file_or_path, 'rb') as f:
+            return f.read()
+    if hasattr(file_or_path, 'getvalue'):
+        return file_or_path.getvalue()
+    pos = file_or_path.tell() if hasattr(file_or_path, 'tell') else None
+    if hasattr(file_or_path, 'seek'):
+        file_or_path.seek(0)
+    data = file_or_path.read()
+    if pos is not None:
+        file_or_path.seek(pos)
+    return data
+
+
+def content_hash(data: bytes) -> str:
+    """文件内容哈希，作为缓存键（与文件名、临时路径无关）"""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def _frame_nbytes(result) -> int:
+    if isinstance(result, dict):
+        return sum(_frame_nbytes(v) for v in result.values())
+    return int(result.memory_usage(index=True, deep=True).sum())
+
+
+def _copy_result(result):
+    # 调用方会原地修改 DataFrame（增删列、df.at 赋值），缓存中只保留原件
+    if isinstance(result, dict):
+        return {k: v.copy() for k, v in result.items()}
+    return result.copy()
+
+
+class FrameCache:
+    """内容哈希 → 解析结果 的进程级 LRU 缓存，按总内存上限淘汰"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        nbytes = _frame_nbytes(value)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._total_bytes += nbytes
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'total_bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_frame_cache = FrameCache(CACHE_CONFIG['max_bytes'])
+
+
+def _cached_read(reader, file_or_path, kind, **kwargs):
+    data = _read_bytes(file_or_path)
+    if _frame_cache.max_bytes <= 0:
+        # 缓存关闭（如后台任务子进程）：直接解析，不计算哈希、不复制结果
+        return reader(io.BytesIO(data), **kwargs)
+    key = (kind, content_hash(data), tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+    result = _frame_cache.get(key)
+    if result is None:
+        result = reader(io.BytesIO(data), **kwargs)
+        _frame_cache.put(key, result)
+    return _copy_result(result)
+
+
+def read_excel_cached(file_or_path, sheet_name=0, engine=None, **kwargs):
+    """带缓存的 read_excel，相同内容的文件只解析一次"""
+    return _cached_read(read_excel, file_or_path, 'excel', sheet_name=sheet_name, engine=engine, **kwargs)
+
+
+def read_csv_cached(file_or_path, **kwargs):
+    """带缓存的 pd.read_csv，相同内容的文件只解析一次"""
+    return _cached_read(pd.read_csv, file_or_path, 'csv', **kwargs)
+
+
+def cache_stats() -> dict:
+    return _frame_cache.stats()
+
+
+def clear_cache():
+    _frame_cache.clear()
+
+
+def set_cache_limit(max_bytes: int):
+    """调整当前进程的缓存上限并清空已缓存内容；0 表示关闭缓存"""
+    _frame_cache.max_bytes = max_bytes
+    _frame_cache.clear()
+
+
+# 引擎性能对比：python file_io.py <file.xlsx> [...]
+if __name__ == "__main__":
+    import sys
+    import time
+
+    for path in sys.argv[1:]:
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        for name in ('calamine', 'openpyxl'):
+            if name == 'calamine' and not calamine_available():
+                print(f"{path}: calamine 未安装，跳过")
+                continue
+            start = time.perf_counter()
+            df = pd.read_excel(path, engine=name)
+            elapsed = time.perf_counter() - start
+            print(f"{path} ({size_mb:.1f} MB): {name:<9} {elapsed:7.2f}s  {len(df)} 行 × {len(df.columns)} 列")
@@ -0,0 +1,107 @@
+"""Goal 转换调试输出回归基准：确认 ods_goal_vcp 上传路径不再为写 xlsx 付出时间
+
+用法: python goal_dump_benchmark.py [--rows N]，默认 20,000 行国家×类别（每行 12 个月，约 24 万条结果）
+对比三种情况下 get_table_columns_config('ods_goal_vcp', ...) 的耗时：
+  关闭调试输出（默认）/ 开启调试输出（后台线程写出）/ 旧版同步 to_excel
+开启调试输出时上传路径的额外耗时超过同步写出耗时的 10% 视为回归，以非零状态退出
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import table_columns_config
+
+BENCHMARK_CONFIG = {
+    'rows': 20000,
+    'max_overhead_ratio': 0.1,  # 开启调试输出的额外耗时 / 同步写出耗时 的上限
+}
+
+COUNTRIES = ['US', 'UK', 'DE', 'FR', 'IT', 'ES', 'JP', 'CA']
+
+
+def goal_sheet(rows: int) -> pd.DataFrame:
+    """模拟 Goal 宽表（header=None 读入）：SA/DSP 分段标题行 + 国家、类别、12 个月 Budget/Budget% 列"""
+    rng = np.random.default_rng(0)
+    width = 3 + 2 * len(table_columns_config.MONTHS)
+    header = ['Country', 'VCP', 'Total'] + [v for m in table_columns_config.MONTHS for v in (f'{m} Budget', f'{m} Budget%')]
+
+    def section(title, count):
+        body = np.empty((count, width), dtype=object)
+        body[:, 0] = np.array(COUNTRIES, dtype=object)[rng.integers(0, len(COUNTRIES), count)]
+        body[:, 1] = [f'Category {i}' for i in range(count)]
+        body[:, 2] = ''
+        body[:, 3::2] = np.round(rng.random((count, len(table_columns_config.MONTHS))) * 10000, 2)
+        body[:, 4::2] = '5%'
+        title_row = np.full((1, width), '', dtype=object)
+        title_row[0, 0] = title
+        return np.vstack([title_row, body])
+
+    half = rows // 2
+    return pd.DataFrame(np.vstack([np.array([header], dtype=object),
+                                   section('SA Budget', half), section('DSP Budget', rows - half)]))
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def wait_dump_threads():
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon:
+            thread.join()
+
+
+def legacy_convert(sheet, dump_dir):
+    """旧版：转换后在上传路径上同步写出 xlsx"""
+    result = table_columns_config.get_table_columns_config('ods_goal_vcp', sheet.copy())
+    result.to_excel(os.path.join(dump_dir, '表3_正确Goal转换结果.xlsx'), index=False)
+    return result
+
+
+def main(rows: int) -> int:
+    table_columns_config.LOG_CONFIG['level'] = 'WARNING'
+    sheet = goal_sheet(rows)
+
+    with tempfile.TemporaryDirectory() as dump_dir:
+        table_columns_config.DUMP_CONFIG.update(enabled=False, dump_dir=dump_dir)
+        result, disabled = timed(table_columns_config.get_table_columns_config, 'ods_goal_vcp', sheet.copy())
+        print(f"数据: {rows:,} 行宽表 → {len(result):,} 条 Goal 记录")
+
+        table_columns_config.DUMP_CONFIG['enabled'] = True
+        job_id = 'benchmark_job'
+        _, enabled = timed(table_columns_config.get_table_columns_config, 'ods_goal_vcp', sheet.copy(), job_id=job_id)
+        _, background = timed(wait_dump_threads)
+        dumped = sorted(os.listdir(os.path.join(dump_dir, job_id)))
+
+        table_columns_config.DUMP_CONFIG['enabled'] = False
+        _, legacy = timed(legacy_convert, sheet, dump_dir)
+
+    sync_dump = legacy - disabled
+    overhead = enabled - disabled
+    print(f"{'关闭调试输出':<16} {disabled:7.2f}s")
+    print(f"{'开启（后台写出）':<16} {enabled:7.2f}s  后台线程另用 {background:.2f}s 写完 {dumped}")
+    print(f"{'旧版同步写出':<16} {legacy:7.2f}s  其中写 xlsx 约 {sync_dump:.2f}s")
+
+    if not dumped:
+        print(f"[FAIL] 调试输出未写到任务目录 {job_id}/ 下")
+        return 1
+    if overhead > BENCHMARK_CONFIG['max_overhead_ratio'] * sync_dump:
+        print(f"[FAIL] 开启调试输出后上传路径多用 {overhead:.2f}s，超过同步写出耗时的 "
+              f"{BENCHMARK_CONFIG['max_overhead_ratio']:.0%}")
+        return 1
+    print(f"[OK ] 上传路径额外耗时 {overhead:.2f}s（同步写出 {sync_dump:.2f}s）")
+    return 0
+
+
+if __name__ == '__main__':
+    def _arg(name, default):
+        return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+    sys.exit(main(int(_arg('--rows', BENCHMARK_CONFIG['rows']))))
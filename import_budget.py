@@ -0,0 +1,85 @@
+"""启动耗时预算检查：以 python -X importtime 导入各入口/引擎模块，汇总耗时并与预算比较
+
+用法: python import_budget.py [--top N]，任一模块超出预算时以非零状态退出（可用于 CI）
+"""
+import os
+import re
+import subprocess
+import sys
+
+# 各模块冷启动导入耗时预算（毫秒，包含其依赖）；入口模块只应导入 streamlit，功能模块按需加载
+IMPORT_BUDGET_MS = {
+    'app': 1500,
+    'MISI-1.2.0.py': 1500,
+    'sub_module_sales_merge': 3000,
+    'sub_module_merge': 4000,
+    'sub_module_search_insight': 4000,
+    'sub_module_visualization': 4000,
+    'sub_module_data_clean': 4000,
+    'sub_module_pack_form': 4000,
+}
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def _import_statement(target: str) -> str:
+    if target.endswith('.py'):
+        # 文件名不是合法模块名（如 MISI-1.2.0.py），按路径加载
+        return (
+            "import importlib.util as u; "
+            f"s = u.spec_from_file_location('entry', {target!r}); "
+            "s.loader.exec_module(u.module_from_spec(s))"
+        )
+    return f"import {target}"
+
+
+def _top_level_imports(statement: str, target: str) -> list[tuple[float, str]]:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {target} 失败:\n{proc.stderr[-2000:]}")
+
+    top_level = []
+    for line in proc.stderr.splitlines():
+        match = _LINE_RE.match(line)
+        # 缩进为 1 个空格的是被直接导入的顶层模块（耗时含其全部子依赖）
+        if match and len(match.group(3)) == 1:
+            top_level.append((int(match.group(2)) / 1000, match.group(4)))
+    return top_level
+
+
+def measure(target: str) -> tuple[float, list[tuple[float, str]]]:
+    """返回 (总耗时 ms, [(耗时 ms, 顶层依赖名)])，在全新解释器中测量，扣除解释器自身启动导入"""
+    startup = {name for _, name in _top_level_imports('pass', 'python')}
+    top_level = [
+        (ms, name) for ms, name in _top_level_imports(_import_statement(target), target)
+        if name not in startup
+    ]
+    total_ms = sum(ms for ms, _ in top_level)
+    return total_ms, sorted(top_level, reverse=True)
+
+
+def main(top_n: int = 5) -> int:
+    failures = []
+    for target, budget_ms in IMPORT_BUDGET_MS.items():
+        total_ms, heaviest = measure(target)
+        status = 'OK ' if total_ms <= budget_ms else 'OVER'
+        print(f"[{status}] {target:<28} {total_ms:8.1f} ms / 预算 {budget_ms} ms")
+        for ms, name in heaviest[:top_n]:
+            print(f"         {ms:8.1f} ms  {name}")
+        if total_ms > budget_ms:
+            failures.append(target)
+
+    if failures:
+        print(f"\n超出启动预算: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[sys.argv.index('--top') + 1]) if '--top' in sys.argv else 5
+    sys.exit(main(n))
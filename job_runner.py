@@ -0,0 +1,281 @@
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+from uuid import uuid4
+
+import streamlit as st
+
+# 后台任务配置
+JOB_CONFIG = {
+    'max_workers': int(os.environ.get('JOB_MAX_WORKERS', max(1, (os.cpu_count() or 2) - 1))),
+    'job_root': os.environ.get('JOB_ROOT', '/tmp/jobs'),
+    'ttl_seconds': 6 * 3600,
+    'poll_seconds': 2,
+    # 子进程中 file_io 解析缓存的上限：任务只读取一次上传文件，默认关闭，避免每个子进程各占一份缓存内存
+    'worker_cache_mb': int(os.environ.get('JOB_WORKER_CACHE_MB', 0)),
+}
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class JobContext:
+    """传给任务函数的上下文：汇报进度、获取产物路径（可跨进程序列化）"""
+
+    def __init__(self, job_id: str, job_dir: str):
+        self.job_id = job_id
+        self.job_dir = job_dir
+
+    def progress(self, fraction: float, message: str = ''):
+        path = os.path.join(self.job_dir, 'progress.json')
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'progress': max(0.0, min(1.0, float(fraction))), 'message': message}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def artifact_path(self, file_name: str) -> str:
+        return os.path.join(self.job_dir, os.path.basename(file_name))
+
+
+def _init_worker():
+    """子进程初始化：按 worker_cache_mb 设置 file_io 缓存上限"""
+    import file_io
+    file_io.set_cache_limit(JOB_CONFIG['worker_cache_mb'] * 1024 * 1024)
+
+
+def _run_job(fn, ctx: JobContext, args, kwargs):
+    """子进程入口：执行任务函数，返回 {'artifact': 路径, 'file_name': ..., 'message': ...}"""
+    ctx.progress(0.0, '开始处理')
+    result = fn(ctx, *args, **kwargs) or {}
+    ctx.progress(1.0, result.get('message', '处理完成'))
+    return result
+
+
+class JobRunner:
+    """进程池 + 任务表；按提交者轮转派发，避免单个用户占满所有核心"""
+
+    def __init__(self, max_workers: int, job_root: str):
+        self.max_workers = max_workers
+        self.job_root = job_root
+        self._jobs = {}
+        self._pending = OrderedDict()
+        self._running = 0
+        self._lock = threading.RLock()
+        self._executor = None
+        os.makedirs(job_root, exist_ok=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def submit(self, owner: str, label: str, fn: Callable, *args, **kwargs) -> str:
+        """提交任务，立即返回 job_id；fn 须为模块级函数，签名 fn(ctx, *args, **kwargs)"""
+        self.cleanup()
+        job_id = uuid4().hex[:12]
+        job_dir = os.path.join(self.job_root, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'owner': owner,
+                'label': label,
+                'status': STATUS_QUEUED,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'ctx': JobContext(job_id, job_dir),
+                'call': (fn, args, kwargs),
+            }
+            self._pending.setdefault(owner, deque()).append(job_id)
+        self._dispatch()
+        return job_id
+
+    def _dispatch(self):
+        with self._lock:
+            while self._running < self.max_workers and self._pending:
+                owner, queue = next(iter(self._pending.items()))
+                job_id = queue.popleft()
+                if queue:
+                    self._pending.move_to_end(owner)
+                else:
+                    del self._pending[owner]
+
+                job = self._jobs[job_id]
+                fn, args, kwargs = job.pop('call')
+                try:
+                    future = self._get_executor().submit(_run_job, fn, job['ctx'], args, kwargs)
+                except BrokenProcessPool:
+                    self._executor = None
+                    future = self._get_executor().submit(_run_job, fn, job['ctx'], args, kwargs)
+                job['status'] = STATUS_RUNNING
+                job['started_at'] = time.time()
+                self._running += 1
+                future.add_done_callback(lambda f, jid=job_id: self._on_done(jid, f))
+
+    def _dispatch_order(self) -> list:
+        """按 _dispatch 的轮转规则列出所有排队任务的派发顺序（含其他用户的任务）"""
+        queues = OrderedDict((owner, deque(queue)) for owner, queue in self._pending.items())
+        order = []
+        while queues:
+            owner, queue = next(iter(queues.items()))
+            order.append(queue.popleft())
+            if queue:
+                queues.move_to_end(owner)
+            else:
+                del queues[owner]
+        return order
+
+    def _on_done(self, job_id, future):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._running -= 1
+            if job is not None:
+                job['finished_at'] = time.time()
+                try:
+                    job['result'] = future.result()
+                    job['status'] = STATUS_DONE
+                except Exception as e:
+                    job['error'] = f"{e}\n{''.join(traceback.format_exception(e))}"
+                    job['status'] = STATUS_FAILED
+                    if isinstance(e, BrokenProcessPool):
+                        self._executor = None
+        self._dispatch()
+
+    def get(self, job_id: str) -> dict | None:
+        """任务状态快照（含子进程汇报的进度）"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            snapshot = {k: v for k, v in job.items() if k not in ('ctx', 'call')}
+            job_dir = job['ctx'].job_dir
+            if job['status'] == STATUS_QUEUED:
+                order = self._dispatch_order()
+                snapshot['queue_position'] = order.index(job_id) + 1 if job_id in order else 0
+
+        snapshot['progress'], snapshot['message'] = 0.0, ''
+        try:
+            with open(os.path.join(job_dir, 'progress.json'), encoding='utf-8') as f:
+                state = json.load(f)
+            snapshot['progress'], snapshot['message'] = state['progress'], state['message']
+        except (OSError, ValueError):
+            pass
+        return snapshot
+
+    def fetch_artifact(self, job_id: str) -> bytes | None:
+        job = self.get(job_id)
+        if not job or job['status'] != STATUS_DONE or not job['result'].get('artifact'):
+            return None
+        with open(job['result']['artifact'], 'rb') as f:
+            return f.read()
+
+    def cleanup(self):
+        """移除超过 TTL 的已完成任务及其产物目录"""
+        expire_before = time.time() - JOB_CONFIG['ttl_seconds']
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job['finished_at'] and job['finished_at'] < expire_before
+            ]
+            for job_id in expired:
+                job = self._jobs.pop(job_id)
+                shutil.rmtree(job['ctx'].job_dir, ignore_errors=True)
+
+
+@st.cache_resource
+def get_runner() -> JobRunner:
+    """进程级单例：脚本重跑、不同会话共享同一个任务表和进程池"""
+    return JobRunner(JOB_CONFIG['max_workers'], JOB_CONFIG['job_root'])
+
+
+def submit_job(state_key: str, label: str, fn: Callable, *args, **kwargs) -> str:
+    """提交任务并把 job_id 记在当前会话的 state_key 下"""
+    job_id = get_runner().submit(st.session_state.get('SID', 'anonymous'), label, fn, *args, **kwargs)
+    st.session_state[state_key] = job_id
+    return job_id
+
+
+def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
+    base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
+    ext = ext or default_ext
+    return os.path.join("/tmp", f"{base}_{st.session_state.get('SID', 'anonymous')}_{uuid4().hex[:8]}{ext}")
+
+
+def render_job_status(state_key: str, download_label: str, mime_type: str, has_save: bool = False):
+    """显示 state_key 对应任务的状态；未完成时局部轮询，完成后整页重跑并提供下载
+
+    任务结果含 'preview'（DataFrame）时在下载按钮前显示预览；has_save 为 True 时提供"同时保存到 /tmp"选项
+    """
+    job_id = st.session_state.get(state_key)
+    if not job_id:
+        return
+
+    job = get_runner().get(job_id)
+    if job is None:
+        st.warning("⚠️ 任务已过期，请重新提交")
+        return
+
+    if job['status'] == STATUS_FAILED:
+        st.error(f"❌ {job['label']} 失败: {job['error'].splitlines()[0]}")
+        with st.expander("🔍 查看详细错误信息"):
+            st.code(job['error'])
+        return
+
+    if job['status'] == STATUS_DONE:
+        result = job['result']
+        elapsed = job['finished_at'] - job['started_at']
+        st.success(f"✅ {result.get('message', '处理完成')} (耗时 {elapsed:.1f}s)")
+        if result.get('preview') is not None:
+            st.dataframe(result['preview'], use_container_width=True)
+        file_name = result.get('file_name', os.path.basename(result['artifact']))
+        col_d = col_s = st.container()
+        if has_save:
+            col_d, col_s = st.columns(2)
+        with col_d:
+            st.download_button(
+                label=download_label,
+                data=get_runner().fetch_artifact(job_id),
+                file_name=file_name,
+                mime=mime_type,
+                key=f"{state_key}_{job_id}_download",
+                use_container_width=True,
+            )
+        if has_save:
+            with col_s:
+                if st.checkbox("💾 同时保存到 /tmp 目录", key=f"{state_key}_{job_id}_save"):
+                    saved_key = f"{state_key}_{job_id}_saved_path"
+                    if saved_key not in st.session_state:
+                        st.session_state[saved_key] = unique_tmp_path(file_name)
+                        shutil.copyfile(result['artifact'], st.session_state[saved_key])
+                    st.info(f"📁 文件已保存到 {st.session_state[saved_key]}")
+        return
+
+    @st.fragment(run_every=JOB_CONFIG['poll_seconds'])
+    def _poll():
+        current = get_runner().get(job_id)
+        if current is None or current['status'] in (STATUS_DONE, STATUS_FAILED):
+            st.rerun()
+        if current['status'] == STATUS_QUEUED:
+            st.info(f"⏳ {current['label']} 排队中 (队列位置 {current['queue_position']})，任务编号 `{job_id}`")
+        else:
+            st.progress(current['progress'], text=current['message'] or f"{current['label']} 处理中...")
+            st.caption(f"任务编号 `{job_id}` · 可继续操作页面，处理不会中断")
+
+    _poll()
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import io
 import math
+from file_io import read_excel_cached
+from keepa_rollup import monthly_rollup
 
 # Page configuration
 st.set_page_config(
@@ -240,52 +242,15 @@ uploaded_file = st.file_uploader("📁 选择Keepa导出的Excel文件", type=['
 if uploaded_file is not None:
     # Read Excel file
     try:
-        df = pd.read_excel(uploaded_file, sheet_name=0, engine='openpyxl')
+        df = read_excel_cached(uploaded_file, sheet_name=0)
     except Exception as e:
         st.error(f"❌ 无法读取Excel文件: {str(e)}")
         st.write("请确保上传的文件是有效的Excel文件(.xlsx)。")
         uploaded_file = None
 
 if uploaded_file is not None:
-    # Data cleaning: Convert date column to datetime
-    df['日期'] = pd.to_datetime(df['日期'], errors='coerce')
-    
-    # Group by year-month, get last day record of each month
-    df['年月'] = df['日期'].dt.to_period('M')
-    last_day_df = df.groupby('年月').apply(lambda x: x.loc[x['日期'].idxmax()]).reset_index(drop=True)
-    
-    # Calculate days with Prime, Coupon, and Deal prices
-    monthly_counts = df.groupby('年月').agg({
-        'Prime价格($)': lambda x: x.notna().sum(),
-        'Coupon价格($)': lambda x: x.notna().sum(),
-        'Deal价格($)': lambda x: x.notna().sum()
-    }).reset_index()
-    monthly_counts.columns = ['年月', 'Prime价格天数', 'Coupon价格天数', 'Deal价格天数']
-    
-    # Select required columns
-    result_df = last_day_df[['日期', '评分', '评分数', '年月']].copy()
-    
-    # Ensure rating and review count are numeric, fill NA with 0
-    result_df['评分'] = pd.to_numeric(result_df['评分'], errors='coerce').fillna(0)
-    result_df['评分数'] = pd.to_numeric(result_df['评分数'], errors='coerce').fillna(0)
-    
-    # Calculate review count growth percentage (numeric format, no + or %)
-    result_df['评分数增长%'] = result_df['评分数'].pct_change() * 100
-    result_df['评分数增长%'] = result_df['评分数增长%'].fillna(0).round(1)
-    
-    # Format date to YYYY-MM
-    result_df['日期'] = result_df['日期'].dt.strftime('%Y-%m')
-    
-    # Merge price days counts
-    result_df = result_df.merge(
-        monthly_counts[['年月', 'Prime价格天数', 'Coupon价格天数', 'Deal价格天数']],
-        left_on='年月',
-        right_on='年月',
-        how='left'
-    )
-    
-    # Drop temporary column
-    result_df = result_df.drop(columns=['年月'])
+    # Monthly rollup: last-day rating snapshot and price day counts per month
+    result_df = monthly_rollup(df)
     
     # Display the processed data with formatted percentage for display only
     display_df = result_df.copy()
@@ -331,7 +296,7 @@ if uploaded_xlsx is not None:
     
     # Read Excel file
     try:
-        viz_df = pd.read_excel(uploaded_xlsx, engine='openpyxl')
+        viz_df = read_excel_cached(uploaded_xlsx)
     except Exception as e:
         st.error(f"❌ 无法读取Excel文件: {str(e)}")
         st.write("请确保上传的文件是有效的Excel文件(.xlsx格式)且包含正确的列。")
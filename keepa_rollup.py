@@ -0,0 +1,35 @@
+import pandas as pd
+
+PRICE_DAY_COLUMNS = {
+    'Prime价格($)': 'Prime价格天数',
+    'Coupon价格($)': 'Coupon价格天数',
+    'Deal价格($)': 'Deal价格天数',
+}
+
+
+def monthly_rollup(df: pd.DataFrame, keys=()) -> pd.DataFrame:
+    """Keepa 日数据按月汇总：每月最后一天的评分/评分数、评分数环比增长%、各价格类型的有价天数
+
+    keys 为额外分组列（如多个 ASIN 合并导出时传 ['ASIN']），整表一次分组完成，不逐组调用 Python 函数
+    """
+    keys = list(keys)
+    dates = pd.to_datetime(df['日期'], errors='coerce')
+    months = dates.dt.to_period('M').rename('年月')
+    group_by = [df[key] for key in keys] + [months]
+
+    # 每月日期最大的一行（同日多行取第一行，与 idxmax 一致）；日期无法解析的行不参与
+    last_rows = dates.groupby(group_by).idxmax()
+    result_df = df.loc[last_rows.to_numpy(), keys + ['评分', '评分数']].reset_index(drop=True)
+    result_df.insert(len(keys), '日期', dates.loc[last_rows.to_numpy()].dt.strftime('%Y-%m').to_numpy())
+
+    result_df['评分'] = pd.to_numeric(result_df['评分'], errors='coerce').fillna(0)
+    result_df['评分数'] = pd.to_numeric(result_df['评分数'], errors='coerce').fillna(0)
+
+    # 评分数环比增长（数值格式，不带 + 或 %）
+    review_counts = result_df.groupby(keys)['评分数'] if keys else result_df['评分数']
+    result_df['评分数增长%'] = (review_counts.pct_change() * 100).fillna(0).round(1)
+
+    price_days = df[list(PRICE_DAY_COLUMNS)].notna().groupby(group_by).sum().rename(columns=PRICE_DAY_COLUMNS)
+    for column in PRICE_DAY_COLUMNS.values():
+        result_df[column] = price_days[column].to_numpy()
+    return result_df
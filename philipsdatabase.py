@@ -1,7 +1,8 @@
       
+import numpy as np
 import pandas as pd
 import streamlit as st
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 from urllib.parse import quote_plus
 from datetime import datetime, timedelta
 import random
@@ -10,11 +11,18 @@ from email.mime.text import MIMEText
 from email.header import Header
 import io
 import os
+import gzip
+import re
+import tempfile
+import time
 import pytz
+from concurrent.futures import ThreadPoolExecutor
 import chardet
 import mysql_client
 import postgre_client
 import table_columns_config
+import file_io
+import db_engines
 # ==================== 配置常量 ====================
 BRAND_COLOR = "#00a6e4"
 SECONDARY_COLOR = "#0088c7"
@@ -57,6 +65,41 @@ TABLES = {
     'offline_target_daily': {'name': 'Offline Target Daily'},
 }
 
+# 上传配置：ClickHouse 默认走 clickhouse-connect 列式批量写入（Native 格式），按块提交
+UPLOAD_CONFIG = {
+    'clickhouse_bulk_insert': True,
+    'block_size': 100000,
+}
+
+# 清洗配置：无表结构时按抽样行判断列类型，数值占比超过阈值即转为数值列
+CLEAN_CONFIG = {
+    'sample_rows': 1000,
+    'numeric_ratio': 0.5,
+    # 抽样中不同值占比低于阈值的 object 列只转换去重后的值（几乎全不相同的列直接整列转换）
+    'unique_sample_rows': 10000,
+    'unique_ratio': 0.5,
+}
+
+# 导出配置：全表/备份按块流式写入临时文件，format 可选 'csv.gz' / 'parquet'（需要 pyarrow）
+EXPORT_CONFIG = {
+    'format': 'csv.gz',
+    'chunk_rows': 100000,
+    'export_dir': os.path.join(tempfile.gettempdir(), 'db_exports'),
+    'ttl_seconds': 6 * 3600,
+}
+
+# 备份配置：server 为服务端快照表（CREATE TABLE ... + INSERT SELECT，保留最近 retention 份），client 为下载整表文件
+BACKUP_CONFIG = {
+    'mode': 'server',
+    'retention': 5,
+    'snapshot_suffix': '__bak_',
+}
+
+EXPORT_MIME = {
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
 postgre_tables = [
     'ods_category_dsp',
     'offline_deal_sku',
@@ -278,6 +321,7 @@ def init_session_state():
         'backup_buffer': None,
         'backup_filename': None,
         'backup_row_msg': '',
+        'backup_snapshot': None,
         'current_df': None,
         'current_table': None,
         'current_mode': None,
@@ -288,95 +332,197 @@ def init_session_state():
     st.session_state.update({k: v for k, v in defaults.items() if k not in st.session_state})
 
 def get_engine():
-    """创建数据库连接"""
+    """获取 ClickHouse 连接（复用进程级连接池）"""
     password_encoded = quote_plus(DB_CONFIG['password'])
     connection_string = f"clickhouse://{DB_CONFIG['username']}:{password_encoded}@{DB_CONFIG['host']}:{DB_CONFIG['port']}/{DB_CONFIG['database']}"
-    return create_engine(connection_string)
+    return db_engines.get_engine('clickhouse', connection_string)
+
+def get_clickhouse_client():
+    """创建 clickhouse-connect 客户端（HTTP 接口，列式 Native 格式传输）"""
+    import clickhouse_connect
+    return clickhouse_connect.get_client(
+        host=DB_CONFIG['host'],
+        port=DB_CONFIG['port'],
+        username=DB_CONFIG['username'],
+        password=DB_CONFIG['password'],
+        database=DB_CONFIG['database'],
+    )
+
+def bulk_insert_clickhouse(client, table_name, df, block_size=None):
+    """按块列式写入 ClickHouse，返回 (写入行数, 耗时秒)"""
+    block_size = block_size or UPLOAD_CONFIG['block_size']
+    total_rows = len(df)
+    start = time.perf_counter()
+    for i in range(0, total_rows, block_size):
+        client.insert_df(table_name, df.iloc[i:i + block_size])
+    elapsed = time.perf_counter() - start
+    rate = total_rows / elapsed if elapsed > 0 else float(total_rows)
+    print(f"ClickHouse 批量写入 {table_name}: {total_rows} 行, {elapsed:.2f}s, {rate:,.0f} 行/秒")
+    return total_rows, elapsed
+
+def _load_table_schema(key):
+    database, table_name = key
+    query = text(f"SELECT name, type, position FROM system.columns WHERE table = '{table_name}' AND database = '{database}' ORDER BY position")
+    with get_engine().connect() as conn:
+        return pd.read_sql(query, conn)
+
+# ClickHouse 表结构缓存（进程级），键为 (database, table_name)
+table_schema_cache = db_engines.SchemaCache(_load_table_schema)
+
+def get_table_schema(table_name, database):
+    """获取表结构 DataFrame（name, type, position），表不存在时为空"""
+    return table_schema_cache.get((database, table_name))
+
+def invalidate_table_schema(table_name=None):
+    """上传或改表后使表结构缓存失效，table_name 为空时清空全部"""
+    if table_name is None:
+        table_schema_cache.invalidate()
+        postgre_client.invalidate_schema()
+    else:
+        table_schema_cache.invalidate((DB_CONFIG['database'], table_name))
+        postgre_client.invalidate_schema(table_name)
 
 def table_exists(engine, table_name, database):
-    """检查表是否存在"""
-    query = text(f"SELECT * FROM system.tables WHERE name = '{table_name}' AND database = '{database}' LIMIT 1")
-    with engine.connect() as conn:
-        result = pd.read_sql(query, conn)
-    return not result.empty
+    """检查表是否存在（system.columns 中有列即存在）"""
+    return not get_table_schema(table_name, database).empty
 
-def test_insert_permission(engine, table_name, database):
-    """测试INSERT权限 - 动态获取表结构"""
-    try:
-        query = text(f"SELECT name, type FROM system.columns WHERE table = '{table_name}' AND database = '{database}' ORDER BY position LIMIT 5")
-        with engine.connect() as conn:
-            columns_info = pd.read_sql(query, conn)
-        
-        if columns_info.empty:
-            return False
-        
-        test_values = []
-        test_columns = []
-        cleanup_condition = None
-        
-        for _, row in columns_info.iterrows():
-            col_name = row['name']
-            col_type = row['type'].lower()
-            test_columns.append(col_name)
-            
-            if 'int' in col_type or 'float' in col_type or 'decimal' in col_type:
-                test_values.append('0')
-            elif 'date' in col_type or 'time' in col_type:
-                test_values.append("'1970-01-01'")
-            else:
-                test_values.append("'__PERM_TEST__'")
-                if cleanup_condition is None:
-                    cleanup_condition = f"{col_name} = '__PERM_TEST__'"
-        
-        if cleanup_condition is None:
-            cleanup_condition = f"{test_columns[0]} = {test_values[0]}"
-        
-        with engine.connect() as conn:
-            insert_sql = text(f"INSERT INTO {table_name} ({', '.join(test_columns)}) VALUES ({', '.join(test_values)})")
-            conn.execute(insert_sql)
-            cleanup_sql = text(f"DELETE FROM {table_name} WHERE {cleanup_condition}")
-            conn.execute(cleanup_sql)
-            
+def upload_privileges(upload_mode, postgres=False):
+    """上传所需权限，每组内任一权限满足即可（覆盖模式 TRUNCATE 失败时会改用 DELETE）"""
+    required = [('INSERT',)]
+    if upload_mode == 'replace':
+        required.append(('TRUNCATE', 'DELETE') if postgres else ('TRUNCATE', 'ALTER DELETE', 'ALTER TABLE', 'ALTER'))
+    return required
+
+def clickhouse_has_privileges(table_name, database, required):
+    """根据 system.grants 判断权限，不向业务表写入数据；角色取 system.enabled_roles（已展开嵌套授予的角色）"""
+    query = text("""SELECT access_type, database, table, is_partial_revoke
+FROM system.grants
+WHERE user_name = currentUser()
+   OR role_name IN (SELECT role_name FROM system.enabled_roles)""")
+    with get_engine().connect() as conn:
+        grants = pd.read_sql(query, conn)
+    if grants.empty:
+        # 配置文件定义的用户等情况下授权表不可见，信息不完整时不拦截，由 INSERT 自身报错
+        return None
+
+    covers = (grants['database'].isna() | (grants['database'] == database)) & \
+             (grants['table'].isna() | (grants['table'] == table_name))
+    granted = set(grants.loc[covers & (grants['is_partial_revoke'] == 0), 'access_type'])
+    revoked = set(grants.loc[covers & (grants['is_partial_revoke'] != 0), 'access_type'])
+    # GRANT ALL 覆盖所有权限，但对具体权限的部分撤销（如 REVOKE DROP TABLE）只影响被撤销的那一项
+    return all(
+        any((p in granted or 'ALL' in granted) and p not in revoked for p in options)
+        for options in required
+    )
+
+def check_upload_permission(table_name, upload_mode):
+    """检查上传权限，通过的结果按会话缓存；无法读取授权信息时返回 None"""
+    cache = st.session_state.setdefault('permission_cache', {})
+    key = (table_name, upload_mode)
+    if cache.get(key):
         return True
-    except Exception:
-        return False
+
+    try:
+        if table_name in postgre_tables:
+            permitted = postgre_client.has_table_privileges(table_name, upload_privileges(upload_mode, postgres=True))
+        else:
+            permitted = clickhouse_has_privileges(table_name, DB_CONFIG['database'], upload_privileges(upload_mode))
+    except Exception as e:
+        print(f'读取授权信息失败: {str(e)}')
+        return None
+
+    # 只缓存通过的结果，管理员授权后无需重新登录即可重试
+    if permitted:
+        cache[key] = True
+    return permitted
+
+def permission_denied_message(table_name, upload_mode):
+    if table_name in postgre_tables:
+        privileges = 'INSERT, TRUNCATE' if upload_mode == 'replace' else 'INSERT'
+        grant_sql = f"GRANT {privileges} ON {postgre_client.TABLES[table_name]} TO {postgre_client.POSTGRES_CONFIG['user']};"
+    else:
+        grant_sql = f"GRANT INSERT ON {DB_CONFIG['database']}.{table_name} TO {DB_CONFIG['username']};"
+        if upload_mode == 'replace':
+            grant_sql += f"\nGRANT TRUNCATE ON {DB_CONFIG['database']}.{table_name} TO {DB_CONFIG['username']};"
+    return f'权限不足。请联系管理员执行:\n{grant_sql}'
 
 def get_table_columns(engine, table_name, database):
     """获取数据库表的列名"""
     try:
-        query = text(f"SELECT name FROM system.columns WHERE table = '{table_name}' AND database = '{database}' ORDER BY position")
-        with engine.connect() as conn:
-            result = pd.read_sql(query, conn)
+        result = get_table_schema(table_name, database)
         return result['name'].tolist() if not result.empty else []
     except Exception as e:
         st.error(f'获取表结构失败: {str(e)}')
         return []
 
+def column_kind(db_type):
+    """ClickHouse 列类型 → 转换类别：numeric / datetime / string，其余类型不转换"""
+    db_type = db_type.lower()
+    if any(t in db_type for t in ['int', 'float', 'decimal', 'double']):
+        return 'numeric'
+    if any(t in db_type for t in ['date', 'datetime', 'timestamp']):
+        return 'datetime'
+    if any(t in db_type for t in ['string', 'char', 'varchar', 'text']):
+        return 'string'
+    return None
+
+def build_conversion_plan(df, col_type_map):
+    """按表结构一次性生成 {列名: 转换类别}，已是目标类型的列不再转换"""
+    plan = {}
+    for col in df.columns:
+        kind = column_kind(col_type_map[col]) if col in col_type_map else None
+        if kind == 'numeric' and pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        if kind == 'datetime' and pd.api.types.is_datetime64_any_dtype(df[col]):
+            continue
+        if kind:
+            plan[col] = kind
+    return plan
+
+def clean_string_column(series):
+    """去除首尾空格，空值写为空字符串"""
+    return series.astype(str).str.strip().where(series.notna(), '')
+
+def convert_unique_values(series, convert):
+    """object 列只转换去重后的值，再按编码取回（上传数据中重复值很多）
+
+    仅用于非空值全为 str 的列：factorize 按哈希相等去重，1 / 1.0 / True 会被当成同一个值
+    """
+    if series.dtype != object or pd.api.types.infer_dtype(series, skipna=True) != 'string':
+        return convert(series)
+    sample = series
+    if len(sample) > CLEAN_CONFIG['unique_sample_rows']:
+        sample = sample.sample(n=CLEAN_CONFIG['unique_sample_rows'], random_state=0)
+    if sample.nunique(dropna=False) > CLEAN_CONFIG['unique_ratio'] * len(sample):
+        return convert(series)
+    codes, uniques = pd.factorize(series)
+    values = convert(pd.Series(uniques, dtype=object)).to_numpy()
+    if (codes < 0).any():
+        # 编码 -1 为缺失值，取缺失值本身的转换结果
+        values = np.append(values, convert(pd.Series([None], dtype=object)).to_numpy())
+    return pd.Series(values[codes], index=series.index, name=series.name)
+
+def apply_conversion_plan(df, plan):
+    converters = {
+        'numeric': lambda s: convert_unique_values(s, lambda u: pd.to_numeric(u, errors='coerce')),
+        # to_datetime 自带重复值缓存（cache=True）
+        'datetime': lambda s: pd.to_datetime(s, errors='coerce'),
+        'string': lambda s: convert_unique_values(s, clean_string_column),
+    }
+    converted = {col: converters[kind](df[col]) for col, kind in plan.items()}
+    if converted:
+        df = df.assign(**converted)
+    return df
+
 def clean_data(df, table_name=None, database=None):
     """数据清洗 - 根据数据库表结构动态处理"""
     df.columns = [col.strip() for col in df.columns]
     
     if table_name and database:
         try:
-            engine = get_engine()
-            query = text(f"SELECT name, type FROM system.columns WHERE table = '{table_name}' AND database = '{database}'")
-            with engine.connect() as conn:
-                columns_info = pd.read_sql(query, conn)
-            
+            columns_info = get_table_schema(table_name, database)
             col_type_map = dict(zip(columns_info['name'], columns_info['type']))
-            
-            for col in df.columns:
-                if col not in col_type_map:
-                    continue
-                
-                db_type = col_type_map[col].lower()
-                
-                if any(t in db_type for t in ['int', 'float', 'decimal', 'double']):
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-                elif any(t in db_type for t in ['date', 'datetime', 'timestamp']):
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
-                elif any(t in db_type for t in ['string', 'char', 'varchar', 'text']):
-                    df[col] = df[col].astype(str).str.strip().replace('nan', '')
+            df = apply_conversion_plan(df, build_conversion_plan(df, col_type_map))
         except Exception as e:
             st.warning(f'⚠️ 无法获取表结构进行智能清洗,使用基础清洗: {str(e)}')
             df = basic_clean_data(df)
@@ -386,20 +532,20 @@ def clean_data(df, table_name=None, database=None):
     return df
 
 def basic_clean_data(df):
-    """基础数据清洗 - 不依赖数据库结构"""
+    """基础数据清洗 - 不依赖数据库结构，按抽样判断列是否为数值"""
     df.columns = [col.strip() for col in df.columns]
     
+    plan = {}
     for col in df.columns:
-        try:
-            numeric_series = pd.to_numeric(df[col], errors='coerce')
-            if numeric_series.notna().mean() > 0.5:
-                df[col] = numeric_series
-            else:
-                df[col] = df[col].astype(str).str.strip()
-        except:
-            df[col] = df[col].astype(str).str.strip()
+        if pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        sample = df[col]
+        if len(sample) > CLEAN_CONFIG['sample_rows']:
+            sample = sample.sample(n=CLEAN_CONFIG['sample_rows'], random_state=0)
+        numeric_ratio = pd.to_numeric(sample, errors='coerce').notna().mean()
+        plan[col] = 'numeric' if numeric_ratio > CLEAN_CONFIG['numeric_ratio'] else 'string'
     
-    return df
+    return apply_conversion_plan(df, plan)
 
 def send_email(to_email, subject, body, cc_emails=None):
     """通用发送邮件函数"""
@@ -433,8 +579,8 @@ def generate_code():
     return ''.join(random.choices('0123456789', k=6))
 
 # ==================== 导出功能 ====================
-def export_table(table_name, mode='full', filename=None):
-    """通用导出函数：支持全表/备份（CSV）或模板（XLSX）"""
+def export_table(table_name, mode='full', filename=None, source_table=None):
+    """通用导出函数：支持全表/备份（gzip CSV / Parquet 临时文件）或模板（XLSX）"""
     try:
         # 特殊处理 ods_goal_vcp 表的模板下载
         if mode == 'columns' and 'ods_goal_vcp' in table_name:
@@ -449,17 +595,15 @@ def export_table(table_name, mode='full', filename=None):
         engine = get_engine()
         if table_name not in postgre_tables:
             if not table_exists(engine, table_name, DB_CONFIG['database']):
-                return None, f'表 {table_name} 不存在。'
+                return None, None, None, f'表 {table_name} 不存在。'
         
         if mode == 'columns':
             column_names = table_columns_config.get_file_columns_config(table_name)
             if column_names==[]:
-                query = text(f"SELECT name FROM system.columns WHERE table = '{table_name}' AND database = '{DB_CONFIG['database']}' ORDER BY position")
-                with engine.connect() as conn:
-                    df_columns = pd.read_sql(query, conn)
+                df_columns = get_table_schema(table_name, DB_CONFIG['database'])
 
                 if df_columns.empty:
-                    return None, '未找到列信息。'
+                    return None, None, None, '未找到列信息。'
                 column_names = df_columns['name'].tolist()
             df = pd.DataFrame(columns=column_names)
             output_buffer = io.BytesIO()
@@ -469,35 +613,247 @@ def export_table(table_name, mode='full', filename=None):
             return output_buffer, f'{table_name}_template.xlsx', None, None
 
 
-        # 全表或备份模式
-        query = text(f"SELECT * FROM {table_name}")
-        if table_name in postgre_tables:
-            with postgre_client.get_engine().begin() as conn:
-                df=pd.read_sql(query, conn)
-        else:
-            with engine.connect() as conn:
-                df = pd.read_sql(query, conn)
-        
-        if df.empty:
-            return None, None, None, '表为空,无数据导出。'
-        
+        # 全表或备份模式：流式写入临时文件，避免整表 DataFrame + CSV 缓冲区同时驻留内存
+        export_format = resolve_export_format()
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f'{table_name}_backup_{timestamp}.csv' if mode == 'backup' else f'{table_name}_full_data.csv'
-        
-        output_buffer = io.BytesIO()
-        df.to_csv(output_buffer, index=False, encoding='utf-8')
-        output_buffer.seek(0)
-        
-        row_msg = f",包含 {len(df)} 行数据" if not df.empty else "(表为空)"
-        return output_buffer, filename, row_msg, None
+            filename = f'{table_name}_backup_{timestamp}' if mode == 'backup' else f'{table_name}_full_data'
+            filename = f'{filename}.{export_format}'
+
+        # 临时文件只在导出期间存在：读出压缩后的字节即删除，不把文件句柄交给会话或下载按钮
+        cleanup_exports()
+        os.makedirs(EXPORT_CONFIG['export_dir'], exist_ok=True)
+        export_path = os.path.join(EXPORT_CONFIG['export_dir'], f'{datetime.now().strftime("%Y%m%d%H%M%S%f")}_{filename}')
+        try:
+            row_count = stream_table_to_file(table_name, export_path, export_format, source_table)
+            if row_count == 0:
+                return None, None, None, '表为空,无数据导出。'
+            with open(export_path, 'rb') as f:
+                data = f.read()
+        finally:
+            if os.path.exists(export_path):
+                os.remove(export_path)
+
+        row_msg = f",包含 {row_count} 行数据"
+        return data, filename, row_msg, None
     except Exception as e:
         return None, None, None, f'导出失败: {str(e)}'
 
+def resolve_export_format():
+    """导出格式：parquet 需要 pyarrow，未安装时退回 csv.gz"""
+    if EXPORT_CONFIG['format'] == 'parquet':
+        try:
+            import pyarrow  # noqa: F401
+            return 'parquet'
+        except ImportError:
+            pass
+    return 'csv.gz'
+
+def iter_table_chunks(table_name, source_table=None):
+    """按块读取整表：ClickHouse 使用 query_df_stream，PostgreSQL 使用服务端游标；source_table 为快照表时读取快照"""
+    query = f"SELECT * FROM {source_table or table_name}"
+    if table_name in postgre_tables:
+        with postgre_client.get_engine().connect() as conn:
+            streaming_conn = conn.execution_options(stream_results=True, max_row_buffer=EXPORT_CONFIG['chunk_rows'])
+            yield from pd.read_sql(text(query), streaming_conn, chunksize=EXPORT_CONFIG['chunk_rows'])
+        return
+
+    client = get_clickhouse_client()
+    try:
+        with client.query_df_stream(query) as stream:
+            yield from stream
+    finally:
+        client.close()
+
+def arrow_type(db_type):
+    """ClickHouse / PostgreSQL 列类型 → Arrow 类型，无法识别的按字符串导出"""
+    import pyarrow as pa
+    db_type = db_type.lower()
+    while True:
+        match = re.fullmatch(r'(?:nullable|lowcardinality)\((.*)\)', db_type)
+        if match is None:
+            break
+        db_type = match.group(1)
+
+    if db_type.startswith(('int', 'uint', 'bigint', 'smallint')):
+        return pa.int64()
+    if db_type.startswith(('float', 'decimal', 'numeric', 'real', 'double')):
+        return pa.float64()
+    if db_type.startswith(('bool', 'boolean')):
+        return pa.bool_()
+    if db_type.startswith(('datetime', 'timestamp')):
+        return pa.timestamp('us')
+    if db_type.startswith('date'):
+        return pa.date32()
+    return pa.string()
+
+def export_arrow_schema(table_name, columns):
+    """按表结构（而非首个数据块）确定 Parquet schema，避免首块整列为空时推断出 null 类型"""
+    import pyarrow as pa
+    if table_name in postgre_tables:
+        schema = postgre_client.get_table_schema(table_name)
+    else:
+        schema = get_table_schema(table_name, DB_CONFIG['database'])
+    types = dict(zip(schema['name'], schema['type']))
+    return pa.schema([pa.field(col, arrow_type(types.get(col, ''))) for col in columns])
+
+def arrow_ready_chunk(chunk, schema):
+    """把数据块的列整理成 schema 可接受的值：带时区时间转 UTC，Decimal 转浮点，字符串列中的非字符串值转文本"""
+    import pyarrow as pa
+    chunk = chunk.copy()
+    for field in schema:
+        column = chunk[field.name]
+        if isinstance(column.dtype, pd.DatetimeTZDtype):
+            chunk[field.name] = column.dt.tz_convert('UTC').dt.tz_localize(None)
+        elif column.dtype != object:
+            continue
+        elif pa.types.is_floating(field.type):
+            chunk[field.name] = pd.to_numeric(column)
+        elif pa.types.is_string(field.type):
+            chunk[field.name] = column.map(lambda value: value if value is None or isinstance(value, str) else str(value))
+    return chunk
+
+def stream_table_to_file(table_name, path, export_format, source_table=None):
+    """逐块写入 gzip CSV / Parquet 文件，返回总行数"""
+    row_count = 0
+    if export_format == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        writer = None
+        try:
+            for chunk in iter_table_chunks(table_name, source_table):
+                if writer is None:
+                    writer = pq.ParquetWriter(path, export_arrow_schema(table_name, chunk.columns), compression='zstd')
+                table = pa.Table.from_pandas(arrow_ready_chunk(chunk, writer.schema), schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                row_count += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        if writer is None:
+            open(path, 'wb').close()
+        return row_count
+
+    header_written = False
+    with gzip.open(path, 'wt', encoding='utf-8', newline='', compresslevel=6) as f:
+        for chunk in iter_table_chunks(table_name, source_table):
+            chunk.to_csv(f, index=False, header=not header_written)
+            header_written = True
+            row_count += len(chunk)
+    return row_count
+
+def create_backup_snapshot(table_name):
+    """服务端快照备份（数据不经过本机），超出保留份数的旧快照自动删除；返回 (快照表名, 行数)"""
+    timestamp = datetime.now(BEIJING_TZ).strftime('%Y%m%d_%H%M%S')
+    if table_name in postgre_tables:
+        return postgre_client.create_snapshot(table_name, timestamp, BACKUP_CONFIG['retention'], BACKUP_CONFIG['snapshot_suffix'])
+
+    database = DB_CONFIG['database']
+    prefix = f"{table_name}{BACKUP_CONFIG['snapshot_suffix']}"
+    snapshot = f"{prefix}{timestamp}"
+    with get_engine().connect() as conn:
+        conn.execute(text(f"CREATE TABLE {database}.{snapshot} AS {database}.{table_name}"))
+        conn.execute(text(f"INSERT INTO {database}.{snapshot} SELECT * FROM {database}.{table_name}"))
+        row_count = conn.execute(text(f"SELECT count() FROM {database}.{snapshot}")).scalar()
+
+        query = text(f"SELECT name FROM system.tables WHERE database = '{database}' AND startsWith(name, '{prefix}') ORDER BY name DESC")
+        snapshots = pd.read_sql(query, conn)['name'].tolist()
+        for old_snapshot in snapshots[BACKUP_CONFIG['retention']:]:
+            conn.execute(text(f"DROP TABLE IF EXISTS {database}.{old_snapshot}"))
+    return snapshot, row_count
+
+def cleanup_exports():
+    """删除超过 TTL 的导出临时文件"""
+    export_dir = EXPORT_CONFIG['export_dir']
+    if not os.path.isdir(export_dir):
+        return
+    expire_before = time.time() - EXPORT_CONFIG['ttl_seconds']
+    for name in os.listdir(export_dir):
+        path = os.path.join(export_dir, name)
+        try:
+            if os.path.getmtime(path) < expire_before:
+                os.remove(path)
+        except OSError:
+            pass
+
 # ==================== 上传功能 ====================
+def write_clickhouse(table_name, upload_mode, df):
+    """ClickHouse 写入（覆盖模式先清空），返回 (写入行数, 过程说明列表)；在线程中执行，不直接调用 st"""
+    notes = []
+    engine = get_engine()
+    with engine.connect() as conn:
+        if upload_mode == 'replace':
+            try:
+                conn.execute(text(f"TRUNCATE TABLE {table_name}"))
+                notes.append(f"✓ 表 {table_name} 已清空。")
+            except Exception as truncate_e:
+                notes.append(f'TRUNCATE 失败: {str(truncate_e)}\n使用 DELETE 清空。')
+                conn.execute(text(f"DELETE FROM {table_name}"))
+
+    client = None
+    if UPLOAD_CONFIG['clickhouse_bulk_insert']:
+        try:
+            client = get_clickhouse_client()
+        except Exception as client_e:
+            notes.append(f'⚠️ 批量写入通道不可用,改用逐行 INSERT: {str(client_e)}')
+
+    if client is not None:
+        try:
+            inserted, elapsed = bulk_insert_clickhouse(client, table_name, df)
+        finally:
+            client.close()
+        rate = inserted / elapsed if elapsed > 0 else inserted
+        notes.append(f"✓ ClickHouse 写入 {inserted} 行,耗时 {elapsed:.1f}s ({rate:,.0f} 行/秒)")
+    else:
+        df.to_sql(table_name, engine, if_exists='append', index=False)
+        inserted = len(df)
+    return inserted, notes
+
+def replicate_upload(table_name, upload_mode, df):
+    """并发写入 ClickHouse / MySQL / PostgreSQL，每个目标独立连接，返回各目标实际写入行数、耗时与错误"""
+    sinks = {
+        'ClickHouse': lambda data: write_clickhouse(table_name, upload_mode, data),
+        'MySQL': lambda data: (mysql_client.to_mysql_data(table_name, upload_mode, data), []),
+        'PostgreSQL': lambda data: (postgre_client.to_postgresql_data(table_name, upload_mode, data), []),
+    }
+
+    def run_sink(name, write):
+        start = time.perf_counter()
+        try:
+            # 各客户端会原地改列名（转小写等），每个目标使用独立副本
+            rows, notes = write(df.copy())
+            error = None
+        except Exception as e:
+            # 部分提交的客户端（MySQL 跳过问题行、MySQL / PostgreSQL 分批 INSERT 中途失败）在异常上带有已写入行数
+            rows, notes, error = getattr(e, 'inserted', 0), [], str(e)
+        return {
+            'sink': name,
+            'rows': rows,
+            'seconds': time.perf_counter() - start,
+            'error': error,
+            'notes': notes,
+        }
+
+    with ThreadPoolExecutor(max_workers=len(sinks)) as pool:
+        futures = [pool.submit(run_sink, name, write) for name, write in sinks.items()]
+        return [future.result() for future in futures]
+
+def format_sink_result(result):
+    if result['error'] is None:
+        return f"- {result['sink']}: ✓ {result['rows']} 行, {result['seconds']:.1f}s"
+    return f"- {result['sink']}: ✗ 失败 ({result['seconds']:.1f}s) {result['error']}"
+
 def perform_upload(table_name, upload_mode, df, uploaded_file, backup_filename):
     """执行上传逻辑"""
     try:
+        sink_summary = ''
+        failed = []
+        permitted = check_upload_permission(table_name, upload_mode)
+        if permitted is False:
+            return permission_denied_message(table_name, upload_mode)
+        if permitted is None:
+            st.warning('⚠️ 无法读取授权信息,跳过权限预检查。')
+
         if table_name in postgre_tables:
             postgre_client.to_postgresql_data(table_name, upload_mode, df)
         else:
@@ -506,25 +862,25 @@ def perform_upload(table_name, upload_mode, df, uploaded_file, backup_filename):
             if not table_exists(engine, table_name, DB_CONFIG['database']):
                 return f'表 {table_name} 不存在。请先重建表。'
 
-            if not test_insert_permission(engine, table_name, DB_CONFIG['database']):
-                grant_sql = f"GRANT INSERT ON {DB_CONFIG['database']}.{table_name} TO {DB_CONFIG['username']};"
-                if upload_mode == 'replace':
-                    grant_sql += f"\nGRANT TRUNCATE ON {DB_CONFIG['database']}.{table_name} TO {DB_CONFIG['username']};"
-                return f'权限不足。请联系管理员执行:\n{grant_sql}'
-
-
-            with engine.connect() as conn:
-                if upload_mode == 'replace':
-                    try:
-                        conn.execute(text(f"TRUNCATE TABLE {table_name}"))
-                        st.info(f"✓ 表 {table_name} 已清空。")
-                    except Exception as truncate_e:
-                        st.warning(f'TRUNCATE 失败: {str(truncate_e)}\n使用 DELETE 清空。')
-                        conn.execute(text(f"DELETE FROM {table_name}"))
+            counts_before = db_engines.connection_counts()
+            results = replicate_upload(table_name, upload_mode, df)
+            connection_usage = db_engines.diff_counts(counts_before, db_engines.connection_counts())
+            st.caption('数据库连接: ' + ' | '.join(
+                f"{name} 新建 {opened} / 借出 {used}" for name, (opened, used) in connection_usage.items()
+            ))
+            for result in results:
+                for note in result['notes']:
+                    st.info(note)
+                if result['error'] is None:
+                    st.info(f"✓ {result['sink']}: {result['rows']} 行,耗时 {result['seconds']:.1f}s")
+                else:
+                    st.error(f"✗ {result['sink']} 写入失败 (耗时 {result['seconds']:.1f}s): {result['error']}")
 
-                df.to_sql(table_name, engine, if_exists='append', index=False)
-                mysql_client.to_mysql_data(table_name,upload_mode,df)
-                postgre_client.to_postgresql_data(table_name,upload_mode,df)
+            sink_summary = '\n'.join(format_sink_result(r) for r in results)
+            failed = [r['sink'] for r in results if r['error'] is not None]
+            # ClickHouse 是主库：主库失败即整体失败，不发送成功日志；仅从库失败视为部分失败
+            if 'ClickHouse' in failed:
+                return f'上传失败: ClickHouse 写入失败,从库结果见明细\n{sink_summary}\n\n提示:检查权限或重建表后重试。'
 
         beijing_time = datetime.now(BEIJING_TZ)
         operation_type = '覆盖 (Replace)' if upload_mode == 'replace' else '续表 (Append)'
@@ -540,13 +896,15 @@ def perform_upload(table_name, upload_mode, df, uploaded_file, backup_filename):
 上传行数: {row_count}
 备份文件: {backup_filename}
 操作说明: 数据已成功{"清空并" if upload_mode == "replace" else ""}上传到 ClickHouse 数据库。
-如有疑问,请联系管理员。"""
+{f"写入明细:{chr(10)}{sink_summary}{chr(10)}" if sink_summary else ""}如有疑问,请联系管理员。"""
         
         if send_email(EMAIL_CONFIG['log_recipient'], log_subject, log_body, EMAIL_CONFIG['cc_recipient']):
             st.info('📧 操作日志已发送到指定邮箱。')
         else:
             st.warning('⚠️ 上传成功,但日志邮件发送失败。')
         
+        if failed:
+            return f'部分写入失败: {"、".join(failed)} 未完成,请处理后补写。\n{sink_summary}'
         return f'成功: 已{operation_type} {row_count} 行数据到表 {table_name}。'
     
     except Exception as e:
@@ -617,6 +975,8 @@ def upload_data(table_name, upload_mode, uploaded_file):
     
     original_filename = uploaded_file.name
     file_lower = original_filename.lower()
+    # 每次上传重新读取一次表结构，本次上传内的后续校验复用缓存
+    invalidate_table_schema(table_name)
     st.info(f'📄 正在处理文件: **{original_filename}**')
     
     try:
@@ -631,7 +991,7 @@ def upload_data(table_name, upload_mode, uploaded_file):
         elif file_lower.endswith(('.xlsx', '.xls')):
             st.info('📊 识别为 Excel 文件，正在读取...')
             try:
-                df = pd.read_excel(uploaded_file)
+                df = file_io.read_excel(uploaded_file)
             except Exception as e:
                 return f'❌ 读取Excel文件失败: {str(e)}\n\n请确认文件未损坏，或尝试另存为CSV格式。'
         
@@ -645,7 +1005,12 @@ def upload_data(table_name, upload_mode, uploaded_file):
         if df.empty:
             return '❌ 文件内容为空，没有数据行'
 
-        df=table_columns_config.get_table_columns_config(table_name,df)
+        # 任务编号：表名 + 上传时间，转换调试输出按任务分目录，便于与上传记录对应
+        upload_job_id = f"{table_name}_{datetime.now(BEIJING_TZ).strftime('%Y%m%d_%H%M%S_%f')}"
+        df=table_columns_config.get_table_columns_config(table_name,df,job_id=upload_job_id)
+        dump_dir = os.path.join(table_columns_config.DUMP_CONFIG['dump_dir'], upload_job_id)
+        if table_columns_config.DUMP_CONFIG['enabled'] and os.path.isdir(dump_dir):
+            st.caption(f'转换结果调试输出: {dump_dir}')
         
         st.success(f'✅ 文件读取成功！数据维度: **{len(df)}** 行 × **{len(df.columns)}** 列')
         
@@ -685,6 +1050,20 @@ def upload_data(table_name, upload_mode, uploaded_file):
         st.session_state.current_mode = upload_mode
         st.session_state.current_uploaded_file = uploaded_file
         
+        if not st.session_state.backup_generated:
+            st.session_state.backup_snapshot = None
+        if not st.session_state.backup_generated and BACKUP_CONFIG['mode'] == 'server':
+            st.info('💾 正在创建服务端快照...')
+            try:
+                snapshot, row_count = create_backup_snapshot(table_name)
+                st.session_state.backup_snapshot = snapshot
+                st.session_state.backup_filename = snapshot
+                st.session_state.backup_row_msg = f",包含 {row_count} 行数据"
+                st.session_state.backup_generated = True
+                st.success(f'✅ 服务端快照已创建: {snapshot}')
+            except Exception as e:
+                st.warning(f'⚠️ 服务端快照失败,改为生成备份文件: {str(e)}')
+
         if not st.session_state.backup_generated:
             st.info('💾 正在生成备份...')
             buffer, filename, row_msg, error = export_table(table_name, mode='backup')
@@ -798,6 +1177,30 @@ def render_captcha_ui():
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+def render_snapshot_backup():
+    """服务端快照信息；备份文件仅在点击时从快照表导出"""
+    snapshot = st.session_state.backup_snapshot
+    st.info(f'💾 服务端快照 `{snapshot}` 已创建{st.session_state.backup_row_msg},保留最近 {BACKUP_CONFIG["retention"]} 份。')
+
+    if st.session_state.backup_buffer is None:
+        if st.button('📥 导出快照文件 (可选)', use_container_width=True):
+            with st.spinner('正在导出快照...'):
+                filename = f'{snapshot}.{resolve_export_format()}'
+                buffer, _, _, error = export_table(st.session_state.current_table, mode='backup', filename=filename, source_table=snapshot)
+                if error:
+                    st.error(f'❌ {error}')
+                else:
+                    st.session_state.backup_buffer = buffer
+                    st.rerun()
+    else:
+        st.download_button(
+            label=f'💾 下载快照文件: {snapshot}',
+            data=st.session_state.backup_buffer,
+            file_name=f'{snapshot}.{resolve_export_format()}',
+            mime=EXPORT_MIME[resolve_export_format()],
+            use_container_width=True
+        )
+
 def render_main_ui():
     """渲染主界面"""
     table_name = render_table_selector()
@@ -836,7 +1239,9 @@ def render_main_ui():
                 if error:
                     st.error(f'❌ {error}')
                 else:
-                    st.download_button(label='⬇️ 下载全表数据 (CSV)', data=buffer, file_name=filename, mime='text/csv', use_container_width=True)
+                    export_format = resolve_export_format()
+                    st.download_button(label=f'⬇️ 下载全表数据 ({export_format.upper()})', data=buffer, file_name=filename,
+                                       mime=EXPORT_MIME[export_format], use_container_width=True)
     
     render_divider(thick=True)
     
@@ -862,7 +1267,10 @@ def render_main_ui():
         with st.spinner('正在处理文件...'):
             result = upload_data(table_name, upload_mode, uploaded_file)
             if result == 'backup_ready':
-                st.success('✅ 备份已准备好,请下载后继续。')
+                if st.session_state.backup_snapshot:
+                    st.success('✅ 服务端快照已创建,确认后继续上传。')
+                else:
+                    st.success('✅ 备份已准备好,请下载后继续。')
             elif '成功' in result:
                 st.success(f'✅ {result}')
                 st.balloons()
@@ -873,25 +1281,28 @@ def render_main_ui():
         render_divider(thick=True)
         st.markdown('<div class="section-title"><span class="icon">💾</span>备份文件下载</div>', unsafe_allow_html=True)
         
-        st.warning(f'⚠️ 备份文件已生成{st.session_state.backup_row_msg}')
-        st.info('📌 **重要提示**: 请先下载备份文件,然后勾选确认框,最后点击"继续上传"按钮。')
-        
-        col1, col2 = st.columns([2, 1])
-        col1, col2 = st.columns([2, 1])
-        with col1:
-            st.download_button(
-                label=f'💾 下载备份文件: {st.session_state.backup_filename}',
-                data=st.session_state.backup_buffer,
-                file_name=st.session_state.backup_filename,
-                mime='text/csv',
-                use_container_width=True
-            )
-        with col2:
-            st.markdown('<div style="text-align: center; padding-top: 8px;">', unsafe_allow_html=True)
-            st.markdown('<span class="badge badge-warning">必须下载</span>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-        
-        st.session_state.backup_download_confirmed = st.checkbox('✓ 我已下载备份文件', value=st.session_state.backup_download_confirmed)
+        if st.session_state.backup_snapshot:
+            render_snapshot_backup()
+        else:
+            st.warning(f'⚠️ 备份文件已生成{st.session_state.backup_row_msg}')
+            st.info('📌 **重要提示**: 请先下载备份文件,然后勾选确认框,最后点击"继续上传"按钮。')
+            
+            col1, col2 = st.columns([2, 1])
+            with col1:
+                st.download_button(
+                    label=f'💾 下载备份文件: {st.session_state.backup_filename}',
+                    data=st.session_state.backup_buffer,
+                    file_name=st.session_state.backup_filename,
+                    mime=EXPORT_MIME[resolve_export_format()],
+                    use_container_width=True
+                )
+            with col2:
+                st.markdown('<div style="text-align: center; padding-top: 8px;">', unsafe_allow_html=True)
+                st.markdown('<span class="badge badge-warning">必须下载</span>', unsafe_allow_html=True)
+                st.markdown('</div>', unsafe_allow_html=True)
+        
+        confirm_label = '✓ 我已确认服务端快照' if st.session_state.backup_snapshot else '✓ 我已下载备份文件'
+        st.session_state.backup_download_confirmed = st.checkbox(confirm_label, value=st.session_state.backup_download_confirmed)
         
         if st.session_state.backup_download_confirmed:
             if st.button('✅ 继续上传', type='primary', use_container_width=True):
@@ -903,6 +1314,7 @@ def render_main_ui():
                     st.session_state.backup_buffer = None
                     st.session_state.backup_filename = None
                     st.session_state.backup_row_msg = ''
+                    st.session_state.backup_snapshot = None
                     st.session_state.current_df = None
                     st.session_state.current_table = None
                     st.session_state.current_mode = None
@@ -924,10 +1336,10 @@ def render_main_ui():
     <div class="info-box">
     <ul>
         <li><strong>导出空表模板</strong>: 生成包含列名的空 XLSX 文件,方便填写数据</li>
-        <li><strong>下载全表数据</strong>: 导出当前表的所有数据为 CSV 文件</li>
+        <li><strong>下载全表数据</strong>: 导出当前表的所有数据为 gzip 压缩的 CSV 文件</li>
         <li><strong>覆盖模式</strong>: 清空表中所有数据后上传新数据</li>
         <li><strong>续表模式</strong>: 将新数据追加到现有数据之后</li>
-        <li><strong>备份机制</strong>: 上传前会自动创建备份,必须下载后才能继续</li>
+        <li><strong>备份机制</strong>: 上传前会在数据库中自动创建快照表(保留最近几份),可按需导出下载</li>
         <li><strong>操作日志</strong>: 每次上传操作都会发送邮件日志到管理员</li>
     </ul>
     </div>
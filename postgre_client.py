@@ -1,9 +1,15 @@
       
+import csv
+import io
+import time
+
 import psycopg2
-from sqlalchemy import create_engine, text, MetaData, Table
+from sqlalchemy import text, MetaData, Table
 from urllib.parse import quote_plus
 import pandas as pd
 
+import db_engines
+
 POSTGRES_CONFIG = {
     'host': 'postgre.cluster-cavkqwqmyvuw.us-west-2.rds.amazonaws.com',  # 替换为实际的PostgreSQL主机
     'port': 5432,  # PostgreSQL默认端口
@@ -29,28 +35,167 @@ TABLES = {
     'offline_target_daily': 'offline_target_daily',
 }
 
+# COPY FROM STDIN 批量写入配置：失败时回退到分批 INSERT
+COPY_CONFIG = {
+    'enabled': True,
+    'chunk_rows': 200000,  # 每次 COPY 的行数（控制文本缓冲区内存）
+    'statement_timeout_ms': 1800000,
+}
+# 文本类列：空字符串按原样写入；其余类型（数值、日期等）的空字符串 COPY 无法解析，写为 NULL
+TEXT_COLUMN_TYPES = ('text', 'character varying', 'character', 'json', 'jsonb', 'xml', 'citext')
+# COPY 文本格式的转义：反斜杠、制表符、换行（\N 才表示 NULL，字面量 "\N" 会被转义为 "\\N"）
+COPY_TEXT_ESCAPES = (('\\', '\\\\'), ('\t', '\\t'), ('\n', '\\n'), ('\r', '\\r'))
+
 def get_engine():
     """创建PostgreSQL数据库连接"""
     password_encoded = quote_plus(POSTGRES_CONFIG['password'])
     connection_string = f"postgresql+psycopg2://{POSTGRES_CONFIG['user']}:{password_encoded}@{POSTGRES_CONFIG['host']}:{POSTGRES_CONFIG['port']}/{POSTGRES_CONFIG['database']}"
-    return create_engine(connection_string)
+    return db_engines.get_engine('postgresql', connection_string)
 
-def get_table_columns( table_name, database):
-    """获取数据库表的列名"""
-    try:
-        query = text(f"""SELECT column_name name
+def _load_table_columns(table_name):
+    query = text(f"""SELECT column_name name, data_type type, ordinal_position position
 FROM information_schema.columns
 WHERE table_name = '{table_name}'
 ORDER BY ordinal_position """)
-        with get_engine().begin() as conn:
-            result = pd.read_sql(query, conn)
+    with get_engine().begin() as conn:
+        return pd.read_sql(query, conn)
+
+# 表结构缓存（进程级），键为数据库中的实际表名
+_schema_cache = db_engines.SchemaCache(_load_table_columns)
+
+def _schema_key(table_name):
+    """界面表名与实际表名统一映射为实际表名，避免同一张表缓存两份、失效时漏掉其中一份"""
+    return TABLES.get(table_name, table_name)
+
+def invalidate_schema(table_name=None):
+    """使表结构缓存失效，table_name 为空时清空全部；界面表名与实际表名均可"""
+    _schema_cache.invalidate(None if table_name is None else _schema_key(table_name))
+
+def get_table_schema(table_name):
+    """表结构 DataFrame（name, type, position），走缓存；界面表名与实际表名均可"""
+    return _schema_cache.get(_schema_key(table_name))
+
+def get_table_columns( table_name, database):
+    """获取数据库表的列名"""
+    try:
+        result = get_table_schema(table_name)
         return result['name'].tolist() if not result.empty else []
     except Exception as e:
         print(f'获取表结构失败: {str(e)}')
         raise e
 
+def has_table_privileges(table_name, privilege_options):
+    """has_table_privilege 检查权限；privilege_options 为若干组权限，每组任一满足即可"""
+    table_name = TABLES[table_name]
+    query = text("SELECT has_table_privilege(:table_name, :privilege)")
+    with get_engine().connect() as conn:
+        for options in privilege_options:
+            if not any(conn.execute(query, {'table_name': table_name, 'privilege': p}).scalar() for p in options):
+                return False
+    return True
+
+def create_snapshot(table_name, timestamp, retention, suffix='__bak_'):
+    """服务端快照：CREATE TABLE ... (LIKE ...) + INSERT SELECT，只保留最近 retention 份；返回 (快照表名, 行数)"""
+    table_name = TABLES[table_name]
+    prefix = f"{table_name}{suffix}"
+    snapshot = f"{prefix}{timestamp}"
+    with get_engine().begin() as conn:
+        conn.execute(text(f"CREATE TABLE {snapshot} (LIKE {table_name} INCLUDING ALL)"))
+        row_count = conn.execute(text(f"INSERT INTO {snapshot} SELECT * FROM {table_name}")).rowcount
+        snapshots = conn.execute(text("""SELECT table_name
+FROM information_schema.tables
+WHERE table_schema = current_schema() AND left(table_name, :n) = :prefix
+ORDER BY table_name DESC"""), {'n': len(prefix), 'prefix': prefix}).scalars().all()
+        for old_snapshot in snapshots[retention:]:
+            conn.execute(text(f"DROP TABLE IF EXISTS {old_snapshot}"))
+    print(f"已创建快照 {snapshot}，共 {row_count} 行")
+    return snapshot, row_count
+
+def _copy_column_types(table_name):
+    """{列名: data_type}，与上传校验共用同一缓存项（键经 _schema_key 统一），上传前的失效对 COPY 同样生效；
+    读取失败时为空，此时不做按类型的空值转换"""
+    try:
+        schema = get_table_schema(table_name)
+    except Exception as e:
+        print(f"读取表结构失败，跳过按列类型转换: {e}")
+        return {}
+    return dict(zip(schema['name'], schema['type']))
+
+def _prepare_copy_frame(df, column_types=None):
+    """整理为 COPY 文本格式可直接写入的数据：
+    - 整数值的浮点列（含空值导致的 float64）转为 Int64，避免整数列出现 '1.0'
+    - 非文本列中的空白字符串转为 NULL
+    - 字符串值转义反斜杠、制表符、换行，使 NULL（\\N）与字面量 "\\N"、空字符串互不混淆
+    """
+    column_types = column_types or {}
+    frame = df.copy()
+    for col in frame.columns:
+        column = frame[col]
+        if pd.api.types.is_float_dtype(column):
+            values = column.dropna()
+            if not values.empty and (values % 1 == 0).all():
+                frame[col] = column.astype('Int64')
+            continue
+        if column.dtype != object:
+            continue
+
+        is_string = column.map(lambda value: isinstance(value, str))
+        if not is_string.any():
+            continue
+        strings = column[is_string]
+        db_type = column_types.get(col)
+        if db_type is not None and db_type not in TEXT_COLUMN_TYPES:
+            strings = strings.mask(strings.str.strip() == '')
+        for old, new in COPY_TEXT_ESCAPES:
+            strings = strings.str.replace(old, new, regex=False)
+        column = column.copy()
+        column[is_string] = strings
+        frame[col] = column
+    return frame
+
+def copy_dataframe(engine, table_name, df, chunk_rows=None, column_types=None):
+    """COPY FROM STDIN（文本格式）流式写入，按块生成缓冲区，全部块在同一事务中提交；返回写入行数
+    column_types 为 {列名: data_type}，默认从 information_schema 读取"""
+    chunk_rows = chunk_rows or COPY_CONFIG['chunk_rows']
+    cached_types = column_types is None
+    if cached_types:
+        column_types = _copy_column_types(table_name)
+    frame = _prepare_copy_frame(df, column_types)
+    columns = ', '.join(f'"{col}"' for col in frame.columns)
+    sql = f"COPY {table_name} ({columns}) FROM STDIN"
+
+    total_rows = len(frame)
+    start_time = time.perf_counter()
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"SET LOCAL statement_timeout = {COPY_CONFIG['statement_timeout_ms']}")
+            for i in range(0, total_rows, chunk_rows):
+                buffer = io.StringIO()
+                # 字符串已按 COPY 文本格式转义，不再加 CSV 引号；引号字符设为数据中不会出现的控制字符
+                frame.iloc[i:i + chunk_rows].to_csv(
+                    buffer, sep='\t', index=False, header=False, na_rep='\\N',
+                    quoting=csv.QUOTE_NONE, quotechar='\x00', escapechar=None,
+                )
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+                print(f"COPY 已写入 {min(i + chunk_rows, total_rows)}/{total_rows} 行")
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        if cached_types:
+            # 失败可能源于表结构已变更（缓存的列类型过期），下次写入重新读取
+            invalidate_schema(table_name)
+        raise
+    finally:
+        raw_conn.close()
+
+    elapsed = time.perf_counter() - start_time
+    print(f"COPY 写入完成: {total_rows} 行, 耗时 {elapsed:.1f}s ({total_rows / max(elapsed, 1e-6):,.0f} 行/秒)")
+    return total_rows
+
 def to_postgresql_data(table_name, upload_mode, df, batch_size=1000):
-    """优化的分批插入版本 - PostgreSQL适配"""
+    """优化的分批插入版本 - PostgreSQL适配，返回写入行数"""
     # try:
     #     to_mysql_data_safe(table_name, upload_mode, df)
     #     return True
@@ -77,6 +222,17 @@ def to_postgresql_data(table_name, upload_mode, df, batch_size=1000):
                 conn.rollback()
                 conn.execute(text(f"DELETE FROM {table_name}"))
 
+    if COPY_CONFIG['enabled']:
+        try:
+            return copy_dataframe(engine, table_name, df)
+        except Exception as e:
+            # COPY 在单个事务中执行，失败时已整体回滚，可安全改用分批 INSERT
+            print(f"COPY 写入失败，改用分批 INSERT: {e}")
+
+    return insert_dataframe(engine, table_name, df, batch_size)
+
+def insert_dataframe(engine, table_name, df, batch_size=1000):
+    """分批 INSERT（每批独立事务），COPY 不可用或失败时使用；返回写入行数"""
     # 分批插入数据
     total_rows = len(df)
     inserted = 0
@@ -105,10 +261,12 @@ def to_postgresql_data(table_name, upload_mode, df, batch_size=1000):
 
         except Exception as e:
             print(f"插入第{i}-{min(i + batch_size, total_rows) - 1}行时失败: {e}")
+            # 之前的批次已各自提交，异常上带出实际写入行数（与 RejectedRowsError.inserted 一致）
+            e.inserted = inserted
             raise
 
     print(f"数据上传完成，共插入 {total_rows} 行")
-    return True
+    return inserted
 
 def to_mysql_data_safe(table_name, upload_mode, df):
     """安全的批量插入 - PostgreSQL适配"""
@@ -2,6 +2,7 @@ import streamlit as st
 import os
 import re
 from openpyxl import load_workbook
+from file_io import iter_excel_rows
 import tempfile
 import zipfile
 from io import BytesIO
@@ -73,18 +74,11 @@ def process_files(data_files, match_file):
     try:
         # 加载匹配文件 (修改点：读取两列)
         add_log("🔄 开始加载匹配文件...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-            tmp.write(match_file.read())
-            match_file_path = tmp.name
-        
-        match_wb = load_workbook(match_file_path)
-        match_ws = match_wb.active
-        
         # 构建集合
         brand_asin_set = set()
         competitor_brand_set = set()
         
-        for row in match_ws.iter_rows(min_row=1, max_col=2, values_only=True):
+        for row in iter_excel_rows(match_file, max_col=2):
             # 第一列：品牌 ASIN
             if row[0]:
                 brand_asin_set.add(str(row[0]).lower().replace(" ", ""))
@@ -92,9 +86,6 @@ def process_files(data_files, match_file):
             if row[1]:
                 competitor_brand_set.add(str(row[1]).lower().strip())
         
-        match_wb.close()
-        os.unlink(match_file_path)
-        
         # 这里为了匹配 Non-brand 细分逻辑，我们需要把竞品品牌转为正则模式（处理空格）
         # 直接存储处理后的字符串用于 in 判断，或者存储为正则模式
         # 为了简单高效，我们存储为小写且无空格的版本用于 in 判断
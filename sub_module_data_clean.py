@@ -11,10 +11,7 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 import plotly.express as px
 from uuid import uuid4
 from typing import Callable, List, Any, Dict
-
-# 从主程序导入共享函数
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
+from file_io import read_excel_cached, read_csv_cached
 
 def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
     base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
@@ -70,10 +67,9 @@ def render_app_header(emoji_title: str, subtitle: str):
 def read_file_clean(file_path: str) -> pd.DataFrame | None:
     ext = os.path.splitext(file_path)[1].lower()
     if ext == ".csv":
-        return pd.read_csv(file_path, header=None)
-    engine = "openpyxl" if ext == ".xlsx" else "xlrd" if ext == ".xls" else None
-    if engine:
-        return pd.read_excel(file_path, header=None, engine=engine)
+        return read_csv_cached(file_path, header=None)
+    if ext in (".xlsx", ".xls"):
+        return read_excel_cached(file_path, header=None)
     return None
 
 def write_processed_file(df: pd.DataFrame, path: str, ext: str):
@@ -9,59 +9,9 @@ import tempfile
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 import plotly.express as px
-from uuid import uuid4
-from typing import Callable, List, Any, Dict
-
-# 从主程序导入共享函数
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
-
-def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
-    base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
-    ext = ext or default_ext
-    return os.path.join("/tmp", f"{base}_{st.session_state.SID}_{uuid4().hex[:8]}{ext}")
-
-def save_df_to_buffer(df: pd.DataFrame) -> io.BytesIO:
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, engine="openpyxl")
-    buffer.seek(0)
-    return buffer
-
-def render_download_section(
-    buffer: io.BytesIO,
-    file_name: str,
-    mime_type: str,
-    download_label: str,
-    key_prefix: str,
-    has_save: bool = False,
-    save_func: Callable[[], None] | None = None,
-    save_path: str | None = None,
-):
-    if has_save:
-        col_d, col_s = st.columns(2)
-        with col_d:
-            st.download_button(
-                label=download_label,
-                data=buffer,
-                file_name=file_name,
-                mime=mime_type,
-                key=f"{key_prefix}_download",
-                use_container_width=True,
-            )
-        with col_s:
-            if st.checkbox("💾 同时保存到 /tmp 目录", key=f"{key_prefix}_save"):
-                if save_func:
-                    save_func()
-                st.info(f"📁 文件已保存到 {save_path}")
-    else:
-        st.download_button(
-            label=download_label,
-            data=buffer,
-            file_name=file_name,
-            mime=mime_type,
-            key=f"{key_prefix}_download",
-            use_container_width=True,
-        )
+from typing import Dict
+from file_io import read_excel_cached, read_csv_cached
+from job_runner import submit_job, render_job_status
 
 def render_app_header(emoji_title: str, subtitle: str):
     st.markdown(f"""
@@ -90,44 +40,45 @@ def process_price_columns(df):
 def read_file_merge(file_path: str) -> pd.DataFrame | None:
     ext = os.path.splitext(file_path)[1].lower()
     if ext == ".csv":
-        return pd.read_csv(file_path)
-    engine = "openpyxl" if ext == ".xlsx" else "xlrd" if ext == ".xls" else None
-    if engine:
-        return _read_excel_cached(file_path, engine=engine)
+        return read_csv_cached(file_path)
+    if ext in (".xlsx", ".xls"):
+        return read_excel_cached(file_path)
     return None
 
-def process_zip_files(
-    uploaded_file,
-    read_cb: Callable[[str], pd.DataFrame | None],
-    process_cb: Callable[[pd.DataFrame, str, str], Any],
-) -> List[Any]:
+def merge_zip_job(ctx, zip_bytes: bytes, save_filename: str) -> dict:
+    """后台任务：解压 ZIP，逐个读取并合并其中的表格，结果写入任务产物文件"""
+    df_list = []
+    errors = []
     with tempfile.TemporaryDirectory() as temp_dir:
-        zip_path = os.path.join(temp_dir, uploaded_file.name)
-        with open(zip_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        with zipfile.ZipFile(zip_path, "r") as z:
+        with zipfile.ZipFile(io.BytesIO(zip_bytes), "r") as z:
             z.extractall(temp_dir)
         files = [f for f in os.listdir(temp_dir) if f.lower().endswith((".xlsx", ".xls", ".csv"))]
         if not files:
-            st.warning("📂 压缩文件中未找到任何 Excel 或 CSV 文件")
-            return []
-        results = []
-        pb = st.progress(0)
-        status = st.empty()
+            raise ValueError("压缩文件中未找到任何 Excel 或 CSV 文件")
         for i, f in enumerate(files):
-            status.text(f"正在处理: {f} ({i+1}/{len(files)})")
-            fp = os.path.join(temp_dir, f)
+            ctx.progress(0.8 * i / len(files), f"正在处理: {f} ({i+1}/{len(files)})")
             try:
-                df = read_cb(fp)
+                df = read_file_merge(os.path.join(temp_dir, f))
                 if df is None:
                     raise ValueError("不支持的文件格式")
-                results.append(process_cb(df, f, temp_dir))
+                df["时间"] = os.path.splitext(f)[0]
+                df_list.append(process_price_columns(df))
             except Exception as e:
-                st.error(f"❌ 处理文件 {f} 失败: {e}")
-            pb.progress((i + 1) / len(files))
-        status.empty()
-        pb.empty()
-        return results
+                errors.append(f"{f}: {e}")
+    if not df_list:
+        raise ValueError("所有文件处理失败: " + "; ".join(errors))
+
+    ctx.progress(0.85, "正在合并数据...")
+    merged_df = pd.concat(df_list, ignore_index=True)
+    merged_df = merged_df.loc[:, ~merged_df.columns.duplicated()]
+    ctx.progress(0.9, "正在写入Excel...")
+    out_path = ctx.artifact_path(save_filename)
+    merged_df.to_excel(out_path, index=False, engine="openpyxl")
+
+    message = f"成功合并 {len(df_list)} 个文件，共 {len(merged_df)} 行数据"
+    if errors:
+        message += f"；{len(errors)} 个文件处理失败: " + "; ".join(errors)
+    return {"artifact": out_path, "file_name": os.path.basename(save_filename), "message": message}
 
 def merge_data_app():
     render_app_header("📊 MI/SI - 合并数据表格", "将多个Excel文件合并为一个统一的数据表格")
@@ -153,33 +104,10 @@ def merge_data_app():
         if not uploaded_file or not save_filename:
             st.warning("⚠️ 请确保已选择 .zip 文件并输入文件名")
             return
-        with st.spinner("🔄 正在处理文件，请稍候..."):
-            save_path = unique_tmp_path(save_filename)
-            def cb_merge(df, fname, _):
-                df["时间"] = os.path.splitext(fname)[0]
-                return process_price_columns(df)
-            df_list = process_zip_files(uploaded_file, read_file_merge, cb_merge)
-            if not df_list:
-                return
-            status = st.empty()
-            prog = st.progress(0)
-            status.text("正在合并数据...")
-            merged_df = pd.concat(df_list, ignore_index=True)
-            merged_df = merged_df.loc[:, ~merged_df.columns.duplicated()]
-            prog.progress(1.0)
-            status.text("合并完成")
-            status.empty()
-            prog.empty()
-            buffer = save_df_to_buffer(merged_df)
-            st.success(f"✅ 成功合并 {len(df_list)} 个文件，共 {len(merged_df)} 行数据")
-            save_func = lambda: merged_df.to_excel(save_path, index=False, engine="openpyxl")
-            render_download_section(
-                buffer,
-                os.path.basename(save_filename),
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                "📥 下载合并后的文件",
-                "merged",
-                has_save=True,
-                save_func=save_func,
-                save_path=save_path,
-            )
+        submit_job("merge_job", "合并数据", merge_zip_job, uploaded_file.getvalue(), save_filename)
+    render_job_status(
+        "merge_job",
+        "📥 下载合并后的文件",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        has_save=True,
+    )
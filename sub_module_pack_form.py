@@ -11,10 +11,7 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 import plotly.express as px
 from uuid import uuid4
 from typing import Callable, List, Any, Dict
-
-# 从主程序导入共享函数
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
+from file_io import read_excel_cached
 
 def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
     base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
@@ -602,7 +599,7 @@ def pack_form_labeler_app():
     st.divider()
     if uploaded_file is not None:
         try:
-            df_input = _read_excel_cached(uploaded_file)
+            df_input = read_excel_cached(uploaded_file)
             st.markdown("#### 文件信息")
             col1, col2, col3 = st.columns(3)
             with col1:
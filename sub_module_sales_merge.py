@@ -6,12 +6,8 @@ import io
 import zipfile
 import tempfile
 import calendar
-
-def save_df_to_buffer(df: pd.DataFrame) -> io.BytesIO:
-    buffer = io.BytesIO()
-    df.to_excel(buffer, index=False, engine="openpyxl")
-    buffer.seek(0)
-    return buffer
+from file_io import read_excel_cached, read_csv_cached
+from job_runner import submit_job, render_job_status
 
 def render_app_header(emoji_title: str, subtitle: str):
     st.markdown(f"""
@@ -27,22 +23,22 @@ def csv_to_dataframe(csv_path: str, header_row: int = 0) -> pd.DataFrame:
     encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1', 'cp1252']
     for encoding in encodings:
         try:
-            df = pd.read_csv(csv_path, encoding=encoding, header=header_row)
+            df = read_csv_cached(csv_path, encoding=encoding, header=header_row)
             return df
         except (UnicodeDecodeError, pd.errors.ParserError):
             continue
-    df = pd.read_csv(csv_path, encoding='utf-8', header=header_row, encoding_errors='ignore')
+    df = read_csv_cached(csv_path, encoding='utf-8', header=header_row, encoding_errors='ignore')
     return df
 
 def excel_to_dataframe(excel_path: str, header_row: int = 0) -> pd.DataFrame:
-    return pd.read_excel(excel_path, header=header_row)
+    return read_excel_cached(excel_path, header=header_row)
 
 def process_zip_files_with_preview(uploaded_file, header_row: int, file_type: str):
     if uploaded_file is None:
         return pd.DataFrame()
     
     with tempfile.TemporaryDirectory() as temp_dir:
-        zip_path = os.path.join(temp_dir, uploaded_file.name)
+        zip_path = os.path.join(temp_dir, getattr(uploaded_file, "name", "upload.zip"))
         with open(zip_path, "wb") as f:
             f.write(uploaded_file.getbuffer())
         
@@ -82,7 +78,7 @@ def process_zip_files(uploaded_file, header_row: int):
         return pd.DataFrame()
     
     with tempfile.TemporaryDirectory() as temp_dir:
-        zip_path = os.path.join(temp_dir, uploaded_file.name)
+        zip_path = os.path.join(temp_dir, getattr(uploaded_file, "name", "upload.zip"))
         with open(zip_path, "wb") as f:
             f.write(uploaded_file.getbuffer())
         
@@ -207,6 +203,37 @@ def merge_monthly_data(rev_df, units_df, asin_df, month_cols):
     else:
         return pd.DataFrame()
 
+def sales_merge_job(ctx, rev_bytes: bytes, units_bytes: bytes, asin_bytes: bytes) -> dict:
+    """后台任务：读取三个 ZIP 并按月份合并，结果写入任务产物文件"""
+    ctx.progress(0.05, "正在读取 Rev. 文件...")
+    rev_df = process_zip_files(io.BytesIO(rev_bytes), header_row=1)
+    ctx.progress(0.2, "正在读取 Units 文件...")
+    units_df = process_zip_files(io.BytesIO(units_bytes), header_row=1)
+    ctx.progress(0.35, "正在读取 Products 文件...")
+    asin_df = process_zip_files(io.BytesIO(asin_bytes), header_row=0)
+
+    if rev_df.empty or units_df.empty or asin_df.empty:
+        raise ValueError("某个文件加载失败")
+
+    # 获取月份列
+    month_cols = [col for col in rev_df.columns if col not in ['Product', 'Product Name', 'Brand', 'Total']]
+
+    ctx.progress(0.5, "正在按月份合并数据...")
+    final = merge_monthly_data(rev_df, units_df, asin_df, month_cols)
+    if final.empty:
+        raise ValueError("无匹配记录")
+
+    ctx.progress(0.8, "正在写入Excel...")
+    out_name = f"merged_sales_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx"
+    out_path = ctx.artifact_path(out_name)
+    final.to_excel(out_path, index=False, engine="openpyxl")
+    return {
+        "artifact": out_path,
+        "file_name": out_name,
+        "message": f"合并完成！共 {len(final)} 行数据",
+        "preview": final.head(10),
+    }
+
 def sales_data_merge_app():
     render_app_header("🔗 销售数据合并工具", "合并Rev.、Units与Prducts")
     
@@ -238,39 +265,19 @@ def sales_data_merge_app():
             st.warning("⚠️ 请上传所有三个ZIP文件")
             return
         
-        with st.spinner("处理数据中..."):
-            rev_df = process_zip_files(rev_zip, header_row=1)
-            units_df = process_zip_files(units_zip, header_row=1)
-            asin_df = process_zip_files(asin_zip, header_row=0)
-            
-            if rev_df.empty or units_df.empty or asin_df.empty:
-                st.error("❌ 某个文件加载失败")
-                return
-            
-            # 获取月份列
-            month_cols = [col for col in rev_df.columns if col not in ['Product', 'Product Name', 'Brand', 'Total']]
-            
-            # 按月份分批处理数据合并
-            final = merge_monthly_data(rev_df, units_df, asin_df, month_cols)
-            
-            if final.empty:
-                st.warning("⚠️ 无匹配记录")
-                return
-            
-            # 保存结果
-            buffer = save_df_to_buffer(final)
-            out_name = f"merged_sales_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.xlsx"
-            
-            st.success(f"✅ 合并完成！共 {len(final)} 行数据")
-            st.dataframe(final.head(10), use_container_width=True)
-            
-            st.download_button(
-                "📥 下载合并结果",
-                data=buffer,
-                file_name=out_name,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+        submit_job(
+            "sales_merge_job",
+            "销售数据合并",
+            sales_merge_job,
+            rev_zip.getvalue(),
+            units_zip.getvalue(),
+            asin_zip.getvalue(),
+        )
+    render_job_status(
+        "sales_merge_job",
+        "📥 下载合并结果",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
 
 if __name__ == "__main__":
     sales_data_merge_app()
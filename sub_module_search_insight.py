@@ -9,59 +9,9 @@ import tempfile
 from openpyxl import Workbook
 from openpyxl.utils.dataframe import dataframe_to_rows
 import plotly.express as px
-from uuid import uuid4
 from typing import Callable, List, Any, Dict
-
-# 从主程序导入共享函数
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
-
-def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
-    base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
-    ext = ext or default_ext
-    return os.path.join("/tmp", f"{base}_{st.session_state.SID}_{uuid4().hex[:8]}{ext}")
-
-def save_workbook_to_buffer(wb: Workbook) -> io.BytesIO:
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-def render_download_section(
-    buffer: io.BytesIO,
-    file_name: str,
-    mime_type: str,
-    download_label: str,
-    key_prefix: str,
-    has_save: bool = False,
-    save_func: Callable[[], None] | None = None,
-    save_path: str | None = None,
-):
-    if has_save:
-        col_d, col_s = st.columns(2)
-        with col_d:
-            st.download_button(
-                label=download_label,
-                data=buffer,
-                file_name=file_name,
-                mime=mime_type,
-                key=f"{key_prefix}_download",
-                use_container_width=True,
-            )
-        with col_s:
-            if st.checkbox("💾 同时保存到 /tmp 目录", key=f"{key_prefix}_save"):
-                if save_func:
-                    save_func()
-                st.info(f"📁 文件已保存到 {save_path}")
-    else:
-        st.download_button(
-            label=download_label,
-            data=buffer,
-            file_name=file_name,
-            mime=mime_type,
-            key=f"{key_prefix}_download",
-            use_container_width=True,
-        )
+from file_io import read_excel_cached
+from job_runner import submit_job, render_job_status
 
 def render_app_header(emoji_title: str, subtitle: str):
     st.markdown(f"""
@@ -105,7 +55,7 @@ def is_fuzzy_match(token: str, brand: str, max_edits: int = 1) -> bool:
     return previous_row[-1] <= max_edits
 
 # --- 修改后的分析函数 ---
-def analyze_search_rows(df: pd.DataFrame, params: List[tuple]):
+def analyze_search_rows(df: pd.DataFrame, params: List[tuple], on_progress: Callable[[float, str], None] | None = None):
     punct = str.maketrans("", "", '!"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~')
     
     # 预处理品牌：去空、去重、转小写
@@ -120,15 +70,19 @@ def analyze_search_rows(df: pd.DataFrame, params: List[tuple]):
     results = []
     brand_words = []
     
-    pb = st.progress(0)
-    status = st.empty()
+    pb = status = None
+    if on_progress is None:
+        pb = st.progress(0)
+        status = st.empty()
+        def on_progress(fraction, text):
+            status.text(text)
+            pb.progress(fraction)
     total_rows = len(df)
 
     for idx, row in df.iterrows():
         # 优化进度条显示频率
         if idx % 50 == 0:
-            status.text(f"正在分析第 {idx+1}/{total_rows} 条数据...")
-            pb.progress((idx + 1) / total_rows)
+            on_progress((idx + 1) / total_rows, f"正在分析第 {idx+1}/{total_rows} 条数据...")
             
         sword = str(row["搜索词"]).lower()
         vol = row["搜索量"] if pd.notna(row["搜索量"]) else 0
@@ -183,11 +137,37 @@ def analyze_search_rows(df: pd.DataFrame, params: List[tuple]):
         else:
             results.append("Non-Branded KWs")
             
-    status.empty()
-    pb.empty()
+    if pb is not None:
+        status.empty()
+        pb.empty()
     df["词性"] = results
     return df, results
 
+def search_insight_job(ctx, file_bytes: bytes, p_params: List[tuple], save_filename: str) -> dict:
+    """后台任务：品牌词/参数分析，结果工作簿写入任务产物文件"""
+    df = read_excel_cached(file_bytes)
+    if df.empty:
+        raise ValueError("上传的文件为空，请检查数据文件")
+    df, kw_types = analyze_search_rows(df, p_params, on_progress=lambda f, text: ctx.progress(0.9 * f, text))
+    branded = kw_types.count("Branded KWs")
+    non_branded = len(kw_types) - branded
+
+    ctx.progress(0.9, "正在保存到Excel...")
+    wb = Workbook()
+    if "Sheet" in wb.sheetnames:
+        wb.remove(wb["Sheet"])
+    ws = wb.create_sheet("源数据")
+    for r in dataframe_to_rows(df, index=False, header=True):
+        ws.append(r)
+    out_name = os.path.basename(save_filename)
+    out_path = ctx.artifact_path(out_name)
+    wb.save(out_path)
+    return {
+        "artifact": out_path,
+        "file_name": out_name,
+        "message": f"分析完成! 品牌词: {branded} 条 | 非品牌词: {non_branded} 条",
+    }
+
 def search_insight_app():
     render_app_header("🔍 SI - 搜索流量洞察", "分析搜索关键词，识别品牌词与非品牌词")
     st.markdown("#### 📋 步骤 1: 下载数据模板")
@@ -228,51 +208,19 @@ def search_insight_app():
         if not uploaded_file or not save_filename:
             st.warning("⚠️ 请确保已上传数据文件并输入输出文件名")
             return
-        with st.spinner("🔄 正在分析数据，请稍候..."):
-            save_path = unique_tmp_path(save_filename)
-            df = _read_excel_cached(uploaded_file)
-            if df.empty:
-                st.warning("📂 上传的文件为空，请检查数据文件")
-                return
-            p_params = []
-            if param_names and param_values:
-                names = [n.strip() for n in re.split(r"[,\uff0c]", param_names) if n.strip()]
-                vals = []
-                for line in param_values.split("\n"):
-                    vs = [v.strip() for v in re.split(r"[,\uff0c]", line) if v.strip()]
-                    if vs:
-                        vals.append(vs)
-                p_params = list(zip(names, vals)) if len(names) == len(vals) else []
-            df, kw_types = analyze_search_rows(df, p_params)
-            branded = kw_types.count("Branded KWs")
-            non_branded = len(kw_types) - branded
-            status = st.empty()
-            prog = st.progress(0)
-            status.text("正在保存到Excel...")
-            prog.progress(0.5)
-            wb = Workbook()
-            if "Sheet" in wb.sheetnames:
-                wb.remove(wb["Sheet"])
-            ws = wb.create_sheet("源数据")
-            for r in dataframe_to_rows(df, index=False, header=True):
-                ws.append(r)
-            prog.progress(1.0)
-            status.text("保存完成")
-            status.empty()
-            prog.empty()
-            buffer = save_workbook_to_buffer(wb)
-            ts = get_timestamp()
-            out_name = f"result_{ts}.xlsx"
-            out_path = os.path.join("/tmp", out_name)
-            st.success(f"✅ 分析完成! 品牌词: {branded} 条 | 非品牌词: {non_branded} 条")
-            save_func = lambda: wb.save(out_path)
-            render_download_section(
-                buffer,
-                out_name,
-                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                "📥 下载处理结果",
-                "result",
-                has_save=True,
-                save_func=save_func,
-                save_path=out_path,
-            )
+        p_params = []
+        if param_names and param_values:
+            names = [n.strip() for n in re.split(r"[,\uff0c]", param_names) if n.strip()]
+            vals = []
+            for line in param_values.split("\n"):
+                vs = [v.strip() for v in re.split(r"[,\uff0c]", line) if v.strip()]
+                if vs:
+                    vals.append(vs)
+            p_params = list(zip(names, vals)) if len(names) == len(vals) else []
+        submit_job("search_insight_job", "搜索流量洞察", search_insight_job, uploaded_file.getvalue(), p_params, save_filename)
+    render_job_status(
+        "search_insight_job",
+        "📥 下载处理结果",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        has_save=True,
+    )
@@ -11,10 +11,7 @@ from openpyxl.utils.dataframe import dataframe_to_rows
 import plotly.express as px
 from uuid import uuid4
 from typing import Callable, List, Any, Dict
-
-# 从主程序导入共享函数
-def _read_excel_cached(file_or_path, sheet_name=0, engine=None):
-    return pd.read_excel(file_or_path, sheet_name=sheet_name, engine=engine)
+from file_io import read_excel_cached
 
 def unique_tmp_path(suggest_name: str, default_ext: str = ".xlsx") -> str:
     base, ext = os.path.splitext(suggest_name or f"result{default_ext}")
@@ -133,7 +130,7 @@ def search_insight_viz_app():
             return
         with st.spinner("🔄 正在生成可视化报表，请稍候..."):
             save_path = unique_tmp_path(save_filename)
-            df = _read_excel_cached(uploaded_file, sheet_name="源数据")
+            df = read_excel_cached(uploaded_file, sheet_name="源数据")
             if df.empty:
                 st.warning("📂 上传的文件为空或不包含'源数据'工作表，请检查数据文件")
                 return
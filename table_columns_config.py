@@ -1,7 +1,30 @@
       
-import re
+import os
+import tempfile
+import threading
+from uuid import uuid4
+
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
+
+# 日志级别：DEBUG 打印逐行/逐单元格明细，INFO 只打印摘要，WARNING 只打印告警
+LOG_CONFIG = {
+    'level': os.environ.get('TABLE_CONFIG_LOG_LEVEL', 'INFO'),
+}
+_LOG_LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30}
+
+# 转换结果调试输出：默认关闭，开启后在后台线程写到 dump_dir/<任务编号>/ 下，不阻塞上传
+DUMP_CONFIG = {
+    'enabled': os.environ.get('GOAL_DUMP_ENABLED', '0') == '1',
+    'dump_dir': os.environ.get('GOAL_DUMP_DIR', os.path.join(tempfile.gettempdir(), 'goal_dumps')),
+}
+
+GOAL_YEAR = 2026
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+TITLE_KEYWORDS = ['Total', 'VCP', 'Year', 'Budget']
+GOAL_COLUMNS = ['VCP_Category', 'ad_type', 'time', 'goal', 'Country']
 ods_asin_philips_file_columns = [
                     'Branded ASINs',
                     'Competitor ASINs',
@@ -68,50 +91,35 @@ offline_target_daily_table_columns = [
     'date','country','roas','spend'
 ]
 
+def get_table_spec(table_name):
+    """按表名 O(1) 查找表规格，未登记的表返回 None"""
+    return TABLE_SPEC_LOOKUP.get(table_name)
+
 def get_file_columns_config(table_name):
-    if  'ods_asin_philips' in table_name:
-        return  ods_asin_philips_file_columns
-    elif 'ods_date_even' in table_name :
-        return ods_date_event_file_columns
-    elif 'ods_asin_sale_goal' in table_name:
-        return ods_asin_sale_goal_file_columns
-    elif 'ods_category_dsp' in table_name:
-        return ods_category_dsp_file_columns
-    elif 'offline_deal_sku' in table_name:
-        return offline_deal_sku_file_columns
-    elif 'offline_roas_subcategory' in table_name:
-        return offline_roas_subcategory_file_columns
-    elif 'offline_target_daily' in table_name:
-        return offline_target_daily_file_columns
-    return []
-
-def get_table_columns_config(table_name,df):
-    if 'ods_asin_philips' in table_name:
-        df.columns = ods_asin_philips_table_columns
-        return df
-    elif 'ods_date_even' in table_name:
-        df=process_ods_date_event_data( df)
-        return df
-    elif 'ods_goal_vcp' in table_name:
-        result = convert_excel_correct_goal(df)
-        if result is None or len(result) == 0:
-            print("\n=== 正确Goal转换失败，尝试简单转换 ===")
-            result = convert_excel_simple_correct_goal(df)
-        return result
-    elif 'ods_asin_sale_goal' in table_name :
-        df.columns = ods_asin_sale_goal_table_columns
-    elif 'ods_category_dsp' in table_name:
-        df.columns = ods_category_dsp_table_columns
-        return df
-    elif 'offline_deal_sku' in table_name:
-        df.columns = offline_deal_sku_table_columns
-        return df
-    elif 'offline_roas_subcategory' in table_name:
-        df.columns = offline_roas_subcategory_table_columns
-        return df
-    elif 'offline_target_daily' in table_name:
-        df.columns = offline_target_daily_table_columns
+    spec = get_table_spec(table_name)
+    return spec['file_columns'] if spec else []
+
+def get_table_columns_config(table_name,df,job_id=None):
+    """按表规格转换上传数据：先校验列数，再按位置改名并做类型转换（一次 assign）
+
+    job_id 为本次上传的任务编号，转换函数的调试输出写到 dump_dir/<job_id>/ 下
+    """
+    spec = get_table_spec(table_name)
+    if spec is None:
         return df
+    if spec['transform'] is not None:
+        return spec['transform'](df, job_id=job_id)
+
+    expected = spec['table_columns']
+    if len(df.columns) != len(expected):
+        raise ValueError(
+            f"文件列数与表 {table_name} 不匹配: 文件 {len(df.columns)} 列, 需要 {len(expected)} 列\n"
+            f"应为: {', '.join(c.strip() for c in spec['file_columns'])}"
+        )
+    df = df.set_axis(expected, axis=1)
+    converted = {col: DTYPE_CONVERTERS[kind](df[col]) for col, kind in spec['dtypes'].items()}
+    if converted:
+        df = df.assign(**converted)
     return df
 
 
@@ -129,43 +137,33 @@ def expand_date_range(df, start_date_col='Star Date', end_date_col='End Date', e
     - country_col: 国家列名
     """
 
-    expanded_rows = []
-
-    for index, row in df.iterrows():
-        try:
-            # 解析开始和结束日期
-            start_date = pd.to_datetime(row[start_date_col])
-            end_date = pd.to_datetime(row[end_date_col])
-
-            # 验证日期有效性
-            if pd.isna(start_date) or pd.isna(end_date):
-                print(f"警告: 行 {index} 的日期无效，跳过")
-                continue
-
-            # 生成日期范围内的每一天
-            current_date = start_date
-            while current_date <= end_date:
-                new_row = {
-                    'date': current_date.date(),  # 转换为日期格式
-                    'Events': row[event_col],
-                    'event_type': row[event_type_col],
-                    'country': row[country_col]
-                }
-                expanded_rows.append(new_row)
-                current_date += timedelta(days=1)
-        except Exception as e:
-            print(f"处理行 {index} 时出错: {e}")
-            continue
-
-    # 创建新的DataFrame
-    if expanded_rows:
-        expanded_df = pd.DataFrame(expanded_rows)
-        return expanded_df
-    else:
+    start_dates = pd.to_datetime(df[start_date_col], errors='coerce')
+    end_dates = pd.to_datetime(df[end_date_col], errors='coerce')
+
+    # 验证日期有效性
+    valid = start_dates.notna() & end_dates.notna()
+    if not valid.all():
+        print(f"警告: 行 {df.index[~valid].tolist()} 的日期无效，跳过")
+
+    # 每行展开的天数（与逐日累加到结束日期的结果一致，结束早于开始时为 0）
+    day_counts = ((end_dates - start_dates).dt.days + 1).where(valid, 0).clip(lower=0).astype(int).to_numpy()
+    total_days = int(day_counts.sum())
+    if total_days == 0:
         return pd.DataFrame(columns=['date', 'Events', 'event_type', 'country'])
 
+    row_idx = np.repeat(np.arange(len(df)), day_counts)
+    day_offsets = np.arange(total_days) - np.repeat(np.cumsum(day_counts) - day_counts, day_counts)
+    dates = start_dates.to_numpy()[row_idx] + day_offsets.astype('timedelta64[D]')
+
+    return pd.DataFrame({
+        'date': pd.DatetimeIndex(dates).date,  # 转换为日期格式
+        'Events': df[event_col].to_numpy()[row_idx],
+        'event_type': df[event_type_col].to_numpy()[row_idx],
+        'country': df[country_col].to_numpy()[row_idx],
+    })
 
-def process_ods_date_event_data(df):
+
+def process_ods_date_event_data(df, job_id=None):
     """
     专门处理 ods_date_event 表的数据转换
     将 Star Date 和 End Date 之间的日期范围展开为每一天
@@ -204,123 +202,123 @@ def convert_excel_correct_goal_file_path(input_file_path):
         print(f"读取文件 {input_file_path} 时出错: {e}")
         return None
 
-def convert_excel_correct_goal(df):
-    """
-    转换Excel数据，goal字段只取Budget值，跳过Budget%
-    """
-    try:
-        # 打印数据结构用于分析
-        print("\n=== 数据结构详细分析 ===")
-        for i in range(min(15, len(df))):
-            row_preview = []
-            for j in range(min(15, df.shape[1])):
-                cell = df.iloc[i, j]
-                if pd.isna(cell):
-                    row_preview.append('NaN')
-                else:
-                    cell_str = str(cell)
-                    row_preview.append(cell_str[:15])
-            print(f"行 {i}: {row_preview}")
-
-        # 从数据中提取国家信息
-        countries = extract_countries_from_data(df)
-        print(f"提取到的国家列表: {countries}")
+def log_enabled(level):
+    return _LOG_LEVELS[level] >= _LOG_LEVELS.get(LOG_CONFIG['level'].upper(), _LOG_LEVELS['INFO'])
 
-        # 处理数据
-        result_data = []
-        year = 2026
 
-        # 月份映射
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-                  'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+def log(message, level='INFO'):
+    if log_enabled(level):
+        print(message)
 
-        current_ad_type = None
 
-        print("\n=== 开始处理数据 ===")
+def cell_text(df, col):
+    """第 col 列去空格后的文本，空单元格为 NaN"""
+    if df.shape[1] <= col:
+        return pd.Series(np.nan, index=df.index, dtype=object)
+    values = df.iloc[:, col]
+    return values.astype(str).str.strip().where(values.notna())
 
-        for i in range(len(df)):
-            # 获取第一列的值（国家信息）
-            country_cell = df.iloc[i, 0] if df.shape[1] > 0 else None
 
-            if pd.notna(country_cell):
-                cell_str = str(country_cell)
+def contains_any(labels, keywords):
+    return labels.str.contains('|'.join(keywords), regex=True, na=False).astype(bool)
 
-                # 检查是否是SA部分标题
-                if 'SA' in cell_str and 'Budget' in cell_str:
-                    current_ad_type = 'SA'
-                    print(f"行 {i}: 找到SA部分 - {cell_str}")
-                    continue
 
-                # 检查是否是DSP部分标题
-                elif 'DSP' in cell_str and 'Budget' in cell_str:
-                    current_ad_type = 'DSP'
-                    print(f"行 {i}: 找到DSP部分 - {cell_str}")
-                    continue
+def log_preview(df):
+    """DEBUG 级别打印前 15 行 × 15 列的数据结构"""
+    if not log_enabled('DEBUG'):
+        return
+    print("\n=== 数据结构详细分析 ===")
+    for i, row in enumerate(df.iloc[:15, :15].itertuples(index=False)):
+        print(f"行 {i}: {['NaN' if pd.isna(cell) else str(cell)[:15] for cell in row]}")
 
-                # 检查是否是其他国家相关的标题（跳过）
-                elif any(keyword in cell_str for keyword in ['Total', 'VCP', 'Year', 'Budget']):
-                    print(f"行 {i}: 跳过标题行 - {cell_str}")
-                    continue
 
-            # 如果是数据行且有当前数据类型
-            if current_ad_type and i > 0:
-                # 检查第一列是否是有效国家代码
-                country = country_cell
-                if (pd.notna(country) and
-                        str(country).strip() in countries and
-                        str(country).strip() != ''):
+def dump_result(result_df, file_name, job_id=None):
+    """按需异步写出转换结果 xlsx，返回输出路径；未开启时返回 None"""
+    if not DUMP_CONFIG['enabled']:
+        return None
+    job_dir = os.path.join(DUMP_CONFIG['dump_dir'], job_id or uuid4().hex[:12])
+    os.makedirs(job_dir, exist_ok=True)
+    output_file = os.path.join(job_dir, file_name)
+    threading.Thread(
+        target=result_df.copy().to_excel,
+        args=(output_file,),
+        kwargs={'index': False},
+        daemon=True,
+    ).start()
+    return output_file
+
+
+def reshape_goal_rows(df, row_positions, ad_types, first_budget_col, year=GOAL_YEAR):
+    """
+    宽表转长表：选定行（第 1 列国家、第 2 列类别）× 月度 Budget 列
+    Budget 列从 first_budget_col 开始每 2 列一个（跳过 Budget%），按行、月份顺序输出
+    """
+    budget_cols = [c for c in range(first_budget_col, first_budget_col + 2 * len(MONTHS), 2) if c < df.shape[1]]
+    if len(row_positions) == 0 or not budget_cols:
+        return pd.DataFrame(columns=GOAL_COLUMNS)
 
-                    # 获取产品类别（应该是第二列）
-                    category = df.iloc[i, 1] if df.shape[1] > 1 else None
+    dates = [month_to_date_string(year, MONTHS[(c - first_budget_col) // 2]) for c in budget_cols]
+    rows = df.iloc[row_positions]
+    n_months = len(budget_cols)
 
-                    if pd.notna(category) and str(category).strip() != '':
-                        print(f"行 {i}: 处理{current_ad_type}数据 - 国家: {country}, 类别: {category}")
+    if log_enabled('DEBUG'):
+        for pos, ad_type in zip(row_positions, ad_types):
+            print(f"行 {pos}: 处理{ad_type}数据 - 国家: {df.iloc[pos, 0]}, 类别: {df.iloc[pos, 1]}")
 
-                        # 处理该行的月度数据（从第3列开始，只取Budget列，跳过Budget%列）
-                        for month_idx, month_name in enumerate(months):
-                            budget_col_idx = 3 + month_idx * 2  # Budget列（每2列的第一列）
+    return pd.DataFrame({
+        'VCP_Category': np.repeat(cell_text(rows, 1).to_numpy(), n_months),
+        'ad_type': np.repeat(np.asarray(ad_types, dtype=object), n_months),
+        'time': np.tile(dates, len(row_positions)),
+        'goal': parse_numeric_values(rows.iloc[:, budget_cols].to_numpy().ravel()),
+        'Country': np.repeat(cell_text(rows, 0).to_numpy(), n_months),
+    })
 
-                            if budget_col_idx < df.shape[1]:
-                                budget_value = extract_numeric_value(df.iloc[i, budget_col_idx])
 
-                                # 跳过百分比列（下一列）
-                                # percentage_col_idx = budget_col_idx + 1  # 这是Budget%列，我们跳过
+def convert_excel_correct_goal(df, job_id=None):
+    """
+    转换Excel数据，goal字段只取Budget值，跳过Budget%
+    """
+    try:
+        log_preview(df)
 
-                                print(f"  {month_name}: Budget列{budget_col_idx} = {budget_value}")
+        # 从数据中提取国家信息
+        countries = extract_countries_from_data(df)
+        log(f"提取到的国家列表: {countries}")
 
-                                # 使用yyyy-MM-dd格式的日期
-                                date_str = month_to_date_string(year, month_name)
+        # 第一列中含 SA/DSP 且含 Budget 的行是分段标题，之后的行属于该广告类型
+        labels = cell_text(df, 0)
+        is_sa = contains_any(labels, ['SA']) & contains_any(labels, ['Budget'])
+        is_dsp = ~is_sa & contains_any(labels, ['DSP']) & contains_any(labels, ['Budget'])
+        is_title = is_sa | is_dsp | contains_any(labels, TITLE_KEYWORDS)
+        ad_types = pd.Series(np.select([is_sa, is_dsp], ['SA', 'DSP'], default=None), index=df.index).ffill()
+        log(f"SA部分标题行: {np.flatnonzero(is_sa).tolist()}, DSP部分标题行: {np.flatnonzero(is_dsp).tolist()}", 'DEBUG')
 
-                                result_data.append({
-                                    'VCP_Category': str(category).strip(),
-                                    'ad_type': current_ad_type,
-                                    'time': date_str,
-                                    'goal': budget_value,
-                                    'Country': str(country).strip()
-                                })
+        categories = cell_text(df, 1)
+        is_data = (ad_types.notna() & ~is_title & labels.isin(countries) & (labels != '')
+                   & categories.notna() & (categories != ''))
+        is_data.iloc[:1] = False
+        positions = np.flatnonzero(is_data.to_numpy())
 
-        # 创建结果DataFrame
-        result_df = pd.DataFrame(result_data)
+        result_df = reshape_goal_rows(df, positions, ad_types.to_numpy()[positions], first_budget_col=3)
 
-        # 保存结果
-        output_file = "表3_正确Goal转换结果.xlsx"
-        result_df.to_excel(output_file, index=False)
+        output_file = dump_result(result_df, "表3_正确Goal转换结果.xlsx", job_id)
 
-        print(f"\n=== 转换结果摘要 ===")
-        print(f"输出文件: {output_file}")
-        print(f"总记录数: {len(result_df)}")
+        log(f"\n=== 转换结果摘要 ===")
+        if output_file:
+            log(f"输出文件: {output_file}")
+        log(f"总记录数: {len(result_df)}")
 
         if len(result_df) > 0:
             print_statistics(result_df)
         else:
-            print("警告: 未生成任何记录")
+            log("警告: 未生成任何记录", 'WARNING')
             # 尝试备用方法
-            return convert_excel_alternative_correct_goal(df, countries, year)
+            return convert_excel_alternative_correct_goal(df, countries, GOAL_YEAR, job_id)
 
         return result_df
 
     except Exception as e:
-        print(f"处理过程中出错: {str(e)}")
+        log(f"处理过程中出错: {str(e)}", 'WARNING')
         import traceback
         traceback.print_exc()
         return None
@@ -328,54 +326,30 @@ def convert_excel_correct_goal(df):
 
 def extract_countries_from_data(df):
     """从数据中提取国家信息"""
-    countries = set()
-
-    # 分析数据，提取有效的国家代码
-    for i in range(len(df)):
-        cell = df.iloc[i, 0] if df.shape[1] > 0 else None
-        if pd.notna(cell):
-            cell_str = str(cell).strip()
-            # 识别常见的国家代码（2-3个字母）
-            if (len(cell_str) in [2, 3] and
-                    cell_str.isalpha() and
-                    cell_str.isupper() and
-                    cell_str not in ['SA', 'DSP', 'VCP', 'NaN', 'Total', 'Year', 'Budget']):
-                countries.add(cell_str)
-
-    # 如果没有找到标准国家代码，尝试从数据内容推断
-    if len(countries) == 0:
-        print("未找到标准国家代码，从数据内容推断...")
-        for i in range(1, min(50, len(df))):  # 检查前50行
-            cell = df.iloc[i, 0] if df.shape[1] > 0 else None
-            if pd.notna(cell):
-                cell_str = str(cell).strip()
-                # 排除明显的标题行
-                if (cell_str not in ['Total', 'VCP', 'Year', 'Budget', 'SA', 'DSP'] and
-                        not any(keyword in cell_str for keyword in ['Budget', 'Year', 'Total']) and
-                        len(cell_str) > 0):
-                    countries.add(cell_str)
+    labels = cell_text(df, 0).dropna()
 
-    return sorted(list(countries))
+    # 识别常见的国家代码（2-3个字母）
+    is_code = (labels.str.len().isin([2, 3]) & labels.str.isalpha() & labels.str.isupper()
+               & ~labels.isin(['SA', 'DSP', 'VCP', 'NaN', 'Total', 'Year', 'Budget']))
+    countries = set(labels[is_code])
 
+    # 如果没有找到标准国家代码，尝试从数据内容推断（检查前50行，排除明显的标题行）
+    if len(countries) == 0:
+        log("未找到标准国家代码，从数据内容推断...")
+        head = cell_text(df, 0).iloc[1:50].dropna()
+        keep = (~head.isin(['Total', 'VCP', 'Year', 'Budget', 'SA', 'DSP'])
+                & ~contains_any(head, ['Budget', 'Year', 'Total']) & (head.str.len() > 0))
+        countries = set(head[keep])
 
-def extract_numeric_value(cell_value):
-    """从单元格中提取数值"""
-    if pd.isna(cell_value):
-        return 0
-
-    cell_str = str(cell_value)
+    return sorted(countries)
 
-    # 移除货币符号、千分位分隔符等
-    cell_str = re.sub(r'[€$,]', '', cell_str).strip()
 
-    # 提取数字
-    numeric_match = re.search(r'[-+]?\d*\.\d+|\d+', cell_str)
-    if numeric_match:
-        try:
-            return float(numeric_match.group())
-        except:
-            return 0
-    return 0
+def parse_numeric_values(values):
+    """向量化提取数值：移除货币符号、千分位分隔符后取第一个数字，无法解析时为 0"""
+    series = pd.Series(values, dtype=object)
+    text = series.where(series.notna(), '').astype(str).str.replace(r'[€$,]', '', regex=True).str.strip()
+    matched = text.str.extract(r'([-+]?\d*\.\d+|\d+)', expand=False)
+    return pd.to_numeric(matched, errors='coerce').fillna(0).to_numpy()
 
 
 def month_to_date_string(year, month_name):
@@ -392,84 +366,41 @@ def month_to_date_string(year, month_name):
 
 def print_statistics(result_df):
     """打印统计信息"""
+    if not log_enabled('INFO'):
+        return
     print(f"产品类别数: {result_df['VCP_Category'].nunique()}")
 
-    sa_count = len(result_df[result_df['ad_type'] == 'SA'])
-    dsp_count = len(result_df[result_df['ad_type'] == 'DSP'])
-    print(f"SA记录数: {sa_count}")
-    print(f"DSP记录数: {dsp_count}")
-
-    sa_total = result_df[result_df['ad_type'] == 'SA']['goal'].sum()
-    dsp_total = result_df[result_df['ad_type'] == 'DSP']['goal'].sum()
-    print(f"SA数据总和: {sa_total:,.2f}")
-    print(f"DSP数据总和: {dsp_total:,.2f}")
+    totals = result_df.groupby('ad_type')['goal'].agg(['size', 'sum'])
+    for ad_type in ['SA', 'DSP']:
+        count, total = totals.loc[ad_type] if ad_type in totals.index else (0, 0)
+        print(f"{ad_type}记录数: {int(count)}")
+        print(f"{ad_type}数据总和: {total:,.2f}")
 
     print(f"国家分布: {result_df['Country'].value_counts().to_dict()}")
 
-    print("\n前10条记录预览:")
-    print(result_df.head(10))
-
-    # 显示数据验证
-    print("\n=== 数据验证 ===")
-    sample_records = result_df.head(6)
-    for idx, record in sample_records.iterrows():
-        print(f"类别: {record['VCP_Category']}, 类型: {record['ad_type']}, "
-              f"时间: {record['time']}, 目标: {record['goal']}, 国家: {record['Country']}")
+    if log_enabled('DEBUG'):
+        print("\n前10条记录预览:")
+        print(result_df.head(10))
 
 
-def convert_excel_alternative_correct_goal(df, countries, year):
+def convert_excel_alternative_correct_goal(df, countries, year, job_id=None):
     """备用转换方法，只取Budget值"""
-    print("=== 使用备用转换方法（只取Budget值）===")
-
-    result_data = []
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-
-    # 简单处理：按行处理，第一列是国家，第二列是类别
-    for i in range(2, len(df)):  # 从第3行开始
-        country = df.iloc[i, 0] if df.shape[1] > 0 else None
-        category = df.iloc[i, 1] if df.shape[1] > 1 else None
+    log("=== 使用备用转换方法（只取Budget值）===")
 
-        if pd.isna(country) or pd.isna(category):
-            continue
+    # 简单处理：从第3行开始，第一列是国家，第二列是类别；前20行假设是SA，后面的是DSP
+    country = cell_text(df, 0)
+    category = cell_text(df, 1)
+    is_data = (country.notna() & category.notna() & (country.str.len() > 0) & (category.str.len() > 0)
+               & ~country.isin(TITLE_KEYWORDS) & ~category.isin(TITLE_KEYWORDS))
+    is_data.iloc[:2] = False
+    positions = np.flatnonzero(is_data.to_numpy())
+    ad_types = np.where(positions < 20, 'SA', 'DSP')
 
-        country_str = str(country).strip()
-        category_str = str(category).strip()
-
-        # 确定广告类型（根据行位置或内容）
-        if i < 20:  # 前20行假设是SA
-            ad_type = 'SA'
-        else:  # 后面的是DSP
-            ad_type = 'DSP'
-
-        # 检查是否是有效数据行
-        if (len(country_str) > 0 and len(category_str) > 0 and
-                country_str not in ['Total', 'VCP', 'Year', 'Budget'] and
-                category_str not in ['Total', 'VCP', 'Year', 'Budget']):
-
-            print(f"行 {i}: {ad_type} - 国家: {country_str}, 类别: {category_str}")
-
-            for month_idx, month_name in enumerate(months):
-                budget_col_idx = 4 + month_idx * 2  # 只取Budget列
-
-                if budget_col_idx < df.shape[1]:
-                    budget_value = extract_numeric_value(df.iloc[i, budget_col_idx])
-                    date_str = month_to_date_string(year, month_name)
-
-                    result_data.append({
-                        'VCP_Category': category_str,
-                        'ad_type': ad_type,
-                        'time': date_str,
-                        'goal': budget_value,
-                        'Country': country_str
-                    })
-
-    result_df = pd.DataFrame(result_data)
+    result_df = reshape_goal_rows(df, positions, ad_types, first_budget_col=4, year=year)
 
     if len(result_df) > 0:
-        output_file = "表3_备用正确Goal转换结果.xlsx"
-        result_df.to_excel(output_file, index=False)
-        print(f"备用方法转换完成！生成 {len(result_df)} 条记录")
+        dump_result(result_df, "表3_备用正确Goal转换结果.xlsx", job_id)
+        log(f"备用方法转换完成！生成 {len(result_df)} 条记录")
         print_statistics(result_df)
 
     return result_df
@@ -481,65 +412,114 @@ def convert_excel_simple_correct_goal_file_path(input_file_path):
     df = pd.read_excel(input_file_path, sheet_name='Sheet1', header=None)
     result = convert_excel_simple_correct_goal(df)
     return result
-def convert_excel_simple_correct_goal(df):
+def convert_excel_simple_correct_goal(df, job_id=None):
     """简单直接的处理版本，只取Budget值"""
-    print("=== 使用简单直接处理版本 ===")
-
-    result_data = []
-    year = 2026
-    months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
-              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+    log("=== 使用简单直接处理版本 ===")
 
     # 假设数据格式：
     # 第一列：国家
     # 第二列：产品类别
-    # 第3列开始：月度数据（Budget, Budget%, Budget, Budget%, ...）
-
-    for i in range(2, len(df)):  # 从第3行开始
-        country = df.iloc[i, 0] if df.shape[1] > 0 else None
-        category = df.iloc[i, 1] if df.shape[1] > 1 else None
-
-        if pd.isna(country) or pd.isna(category):
-            continue
-
-        country_str = str(country).strip()
-        category_str = str(category).strip()
+    # 第5列开始：月度数据（Budget, Budget%, Budget, Budget%, ...）
+    # 从第3行开始，跳过标题行；前30行是SA，后面是DSP
+    country = cell_text(df, 0)
+    category = cell_text(df, 1)
+    is_data = (country.notna() & category.notna()
+               & ~contains_any(country, TITLE_KEYWORDS) & ~contains_any(category, TITLE_KEYWORDS))
+    is_data.iloc[:2] = False
+    positions = np.flatnonzero(is_data.to_numpy())
+    ad_types = np.where(positions < 30, 'SA', 'DSP')
+
+    result_df = reshape_goal_rows(df, positions, ad_types, first_budget_col=4)
 
-        # 跳过标题行
-        if any(keyword in country_str for keyword in ['Total', 'VCP', 'Year', 'Budget']):
-            continue
-        if any(keyword in category_str for keyword in ['Total', 'VCP', 'Year', 'Budget']):
-            continue
-
-        # 根据行位置确定SA/DSP
-        ad_type = 'SA' if i < 30 else 'DSP'  # 假设前30行是SA，后面是DSP
-
-        print(f"行 {i}: {ad_type} - 国家: {country_str}, 类别: {category_str}")
-
-        for month_idx, month_name in enumerate(months):
-            budget_col_idx = 4 + month_idx * 2  # 只取Budget列，跳过Budget%
+    if len(result_df) > 0:
+        dump_result(result_df, "表3_简单正确Goal转换结果.xlsx", job_id)
+        log(f"简单转换完成！生成 {len(result_df)} 条记录")
+        print_statistics(result_df)
 
-            if budget_col_idx < df.shape[1]:
-                budget_value = extract_numeric_value(df.iloc[i, budget_col_idx])
-                date_str = month_to_date_string(year, month_name)
+    return result_df
 
-                result_data.append({
-                    'VCP_Category': category_str,
-                    'ad_type': ad_type,
-                    'time': date_str,
-                    'goal': budget_value,
-                    'Country': country_str
-                })
 
-    result_df = pd.DataFrame(result_data)
+def convert_goal_table(df, job_id=None):
+    """ods_goal_vcp：宽表 Goal 转长表，正确 Goal 转换失败时改用简单转换"""
+    result = convert_excel_correct_goal(df, job_id)
+    if result is None or len(result) == 0:
+        log("\n=== 正确Goal转换失败，尝试简单转换 ===")
+        result = convert_excel_simple_correct_goal(df, job_id)
+    return result
 
-    if len(result_df) > 0:
-        output_file = "表3_简单正确Goal转换结果.xlsx"
-        result_df.to_excel(output_file, index=False)
-        print(f"简单转换完成！生成 {len(result_df)} 条记录")
-        print_statistics(result_df)
 
-    return result_df
+DTYPE_CONVERTERS = {
+    'numeric': lambda s: pd.to_numeric(s, errors='coerce'),
+    'date': lambda s: pd.to_datetime(s, errors='coerce'),
+}
+
+# 表规格登记：文件列（模板表头）、目标列（按位置对应）、列类型、整体转换函数 transform(df, job_id)（有转换函数时不按位置改名）
+TABLE_SPECS = {
+    'ods_asin_philips': {
+        'file_columns': ods_asin_philips_file_columns,
+        'table_columns': ods_asin_philips_table_columns,
+    },
+    'ods_date_event': {
+        'aliases': ['ods_date_even'],
+        'file_columns': ods_date_event_file_columns,
+        'table_columns': ods_date_event_table_columns,
+        'transform': process_ods_date_event_data,
+    },
+    'ods_goal_vcp': {
+        'transform': convert_goal_table,
+    },
+    'ods_asin_sale_goal': {
+        'file_columns': ods_asin_sale_goal_file_columns,
+        'table_columns': ods_asin_sale_goal_table_columns,
+        'dtypes': {'date': 'date', 'pcogs': 'numeric', 'revenue': 'numeric', 'units': 'numeric'},
+    },
+    'ods_category_dsp': {
+        'file_columns': ods_category_dsp_file_columns,
+        'table_columns': ods_category_dsp_table_columns,
+    },
+    'offline_deal_sku': {
+        'file_columns': offline_deal_sku_file_columns,
+        'table_columns': offline_deal_sku_table_columns,
+        'dtypes': {
+            'start_date': 'date', 'end_date': 'date',
+            'sell_out_unit_deal_forecast': 'numeric', 'promo_price': 'numeric', 'pcogs_deal_forecast': 'numeric',
+            'daily_unit_target': 'numeric', 'actual_unit': 'numeric', 'burst_coefficient': 'numeric',
+        },
+    },
+    'offline_roas_subcategory': {
+        'file_columns': offline_roas_subcategory_file_columns,
+        'table_columns': offline_roas_subcategory_table_columns,
+        'dtypes': {'focus_tier': 'numeric', 'roas_floor': 'numeric', 'roas_target': 'numeric'},
+    },
+    'offline_target_daily': {
+        'file_columns': offline_target_daily_file_columns,
+        'table_columns': offline_target_daily_table_columns,
+        'dtypes': {'date': 'date', 'roas': 'numeric', 'spend': 'numeric'},
+    },
+}
+
+
+def _compile_table_specs(specs):
+    """导入时补全默认值、校验登记信息，并展开别名为 表名 → 规格 的查找表"""
+    lookup = {}
+    for table_name, spec in specs.items():
+        compiled = {
+            'file_columns': list(spec.get('file_columns', [])),
+            'table_columns': list(spec.get('table_columns', [])),
+            'dtypes': dict(spec.get('dtypes', {})),
+            'transform': spec.get('transform'),
+        }
+        if compiled['transform'] is None and len(compiled['file_columns']) != len(compiled['table_columns']):
+            raise ValueError(f"表规格 {table_name}: 文件列与目标列数量不一致")
+        unknown = set(compiled['dtypes']) - set(compiled['table_columns'])
+        if unknown:
+            raise ValueError(f"表规格 {table_name}: 类型中的列不在目标列中 {sorted(unknown)}")
+        for name in [table_name] + spec.get('aliases', []):
+            lookup[name] = compiled
+    return lookup
+
+
+TABLE_SPEC_LOOKUP = _compile_table_specs(TABLE_SPECS)
 
 
 # 使用示例